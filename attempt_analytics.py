@@ -0,0 +1,149 @@
+"""Vectorised statistics over recorded attempts.
+
+Attempt histories are flattened once into parallel NumPy columns (question
+index, epoch seconds, correctness) so per-question error rates and
+attempts-to-mastery reduce to ``bincount`` group-bys, and review load is a
+single bucketed count over the queued due times.
+"""
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, List, Sequence, Tuple, Union
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - analytics are unavailable without NumPy
+    np = None  # type: ignore
+
+from attempt_tracking import AttemptTracker
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("NumPy is required for attempt analytics; install numpy.")
+
+
+def _to_epoch_seconds(moment: Union[datetime, float, None]) -> float:
+    if moment is None:
+        return datetime.now(timezone.utc).timestamp()
+    if isinstance(moment, datetime):
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.timestamp()
+    return float(moment)
+
+
+@dataclass
+class AttemptArrays:
+    """Columnar view of every recorded attempt.
+
+    Rows are grouped by question and kept in attempt order within each
+    group; ``question_index[i]`` indexes into ``question_ids``.
+    """
+
+    question_ids: List[str]
+    question_index: "np.ndarray"
+    timestamps: "np.ndarray"
+    correct: "np.ndarray"
+
+    @classmethod
+    def from_histories(
+        cls, histories: Iterable[Tuple[str, Sequence[int], Sequence[int]]]
+    ) -> "AttemptArrays":
+        """Build the columns from ``(question_id, epoch_micros, flags)`` tuples."""
+
+        _require_numpy()
+        question_ids: List[str] = []
+        lengths = array("q")
+        micros = array("q")
+        flags = bytearray()
+        for question_id, timestamps, outcomes in histories:
+            question_ids.append(question_id)
+            lengths.append(len(timestamps))
+            micros.extend(timestamps)
+            flags.extend(outcomes)
+
+        counts = np.frombuffer(lengths, dtype=np.int64)
+        return cls(
+            question_ids=question_ids,
+            question_index=np.repeat(np.arange(len(question_ids), dtype=np.int64), counts),
+            timestamps=np.frombuffer(micros, dtype=np.int64) / 1_000_000.0,
+            correct=np.frombuffer(bytes(flags), dtype=np.uint8).astype(bool),
+        )
+
+    @classmethod
+    def from_tracker(cls, tracker: AttemptTracker) -> "AttemptArrays":
+        return cls.from_histories(tracker.attempt_histories())
+
+    def __len__(self) -> int:
+        return int(self.question_index.size)
+
+    def attempt_counts(self) -> "np.ndarray":
+        """Number of attempts per question, aligned with ``question_ids``."""
+
+        return np.bincount(self.question_index, minlength=len(self.question_ids))
+
+    def incorrect_counts(self) -> "np.ndarray":
+        return np.bincount(
+            self.question_index[~self.correct], minlength=len(self.question_ids)
+        )
+
+    def error_rates(self) -> "np.ndarray":
+        """Fraction of incorrect attempts per question (NaN without attempts)."""
+
+        totals = self.attempt_counts()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.incorrect_counts() / totals
+
+    def attempts_to_mastery(self) -> "np.ndarray":
+        """1-based attempt number of each question's first correct answer.
+
+        Questions that have never been answered correctly are NaN.
+        """
+
+        counts = self.attempt_counts()
+        group_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        position = np.arange(len(self)) - group_starts[self.question_index]
+
+        mastery = np.full(len(self.question_ids), np.nan)
+        correct_questions = self.question_index[self.correct]
+        if correct_questions.size:
+            mastered, first = np.unique(correct_questions, return_index=True)
+            mastery[mastered] = position[self.correct][first] + 1
+        return mastery
+
+
+def forecast_review_load(
+    due_times: Sequence[float],
+    start: Union[datetime, float, None] = None,
+    hours: int = 24,
+    bucket_minutes: int = 60,
+) -> "np.ndarray":
+    """Count reviews coming due in consecutive buckets from ``start``.
+
+    Bucket ``i`` covers ``[start + i * bucket_minutes, start + (i + 1) *
+    bucket_minutes)``. Items already overdue are counted in the first bucket;
+    items beyond the horizon are ignored.
+    """
+
+    _require_numpy()
+    if hours <= 0 or bucket_minutes <= 0:
+        raise ValueError("hours and bucket_minutes must be positive.")
+    bucket_count = -(-hours * 60 // bucket_minutes)
+    origin = _to_epoch_seconds(start)
+    due = np.asarray(due_times, dtype=np.float64)
+    buckets = np.floor((due - origin) / (bucket_minutes * 60.0))
+    buckets = buckets[buckets < bucket_count]
+    return np.bincount(np.maximum(buckets, 0).astype(np.int64), minlength=bucket_count)
+
+
+def forecast_tracker_load(
+    tracker: AttemptTracker,
+    start: Union[datetime, float, None] = None,
+    hours: int = 24,
+    bucket_minutes: int = 60,
+) -> "np.ndarray":
+    return forecast_review_load(tracker.review_due_times(), start, hours, bucket_minutes)
+
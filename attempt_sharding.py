@@ -0,0 +1,312 @@
+"""Learner-aware attempt tracking partitioned into shards.
+
+Learners are assigned to one of ``shard_count`` shards by a stable hash of
+their id. Each shard is an ordinary :class:`~attempt_tracking.AttemptTracker`
+with its own files under ``root/shard-NNN``, keyed by a composite
+``learner_id``/``question_id`` id, so an answer only rewrites (or journals)
+the state of the learners that share its shard. Shards are opened on first
+use and the least recently used ones are closed once more than
+``max_open_shards`` are in memory.
+
+When a shard is closed, the due time of its earliest queued review is written
+next to it, so exports can skip closed shards with nothing due without
+opening them. The index is only used while this process is the only writer.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from attempt_storage import AttemptStorage
+from attempt_tracking import AttemptOutcome, AttemptTracker
+
+# ASCII unit separator: sorts below every printable character, so composite
+# ids order the same way as ``(learner_id, question_id)`` pairs.
+KEY_SEPARATOR = "\x1f"
+
+LearnerItem = Tuple[str, str]
+
+# Per-shard file holding the epoch due time of the shard's earliest queued
+# review, or "none". It only exists while the shard is closed.
+DUE_INDEX_NAME = "due_at.txt"
+_FAR_FUTURE = datetime.max.replace(tzinfo=timezone.utc)
+
+
+def _composite_key(learner_id: str, question_id: str) -> str:
+    if KEY_SEPARATOR in learner_id:
+        raise ValueError(f"Learner id {learner_id!r} contains a reserved separator.")
+    return f"{learner_id}{KEY_SEPARATOR}{question_id}"
+
+
+def _split_key(key: str) -> LearnerItem:
+    learner_id, _, question_id = key.partition(KEY_SEPARATOR)
+    return learner_id, question_id
+
+
+class ShardedAttemptTracker:
+    """Track attempts for many learners across hash-partitioned shards.
+
+    Extra keyword arguments such as ``base_interval_minutes`` or
+    ``flush_interval_ms`` are passed to every shard's
+    :class:`~attempt_tracking.AttemptTracker`; ``journal`` gives each shard
+    its own journal file. Pass ``storage_factory`` to build each shard's
+    backend from its directory instead, for example ``lambda path:
+    SQLiteAttemptStorage(os.path.join(path, "attempts.sqlite3"))``.
+
+    ``shard_count`` is part of the on-disk layout: reopening a root with a
+    different count would look learners up in the wrong shard, so it is
+    recorded in ``root/shards.txt`` and checked on startup.
+
+    Calls are serialised by a single lock, so a shard is never evicted while
+    another thread is using it.
+
+    Closed shards record their earliest due time in ``due_at.txt`` so exports
+    can skip them. That index would miss reviews queued by another process,
+    so it is not used with ``process_safe=True`` or a ``storage_factory``
+    (whose backend, such as SQLite, may be shared); exports then open every
+    stored shard.
+    """
+
+    def __init__(
+        self,
+        root: str = "attempt_shards",
+        shard_count: int = 64,
+        max_open_shards: int = 8,
+        *,
+        journal: bool = False,
+        storage_factory: Optional[Callable[[str], AttemptStorage]] = None,
+        **tracker_options: object,
+    ) -> None:
+        if shard_count <= 0 or max_open_shards <= 0:
+            raise ValueError("shard_count and max_open_shards must be positive.")
+        self.root = root
+        self.shard_count = shard_count
+        self.max_open_shards = max_open_shards
+        self.journal = journal
+        self._storage_factory = storage_factory
+        self._tracker_options = tracker_options
+        # The due index is only trustworthy if no other process writes shards.
+        self._use_due_index = storage_factory is None and not tracker_options.get("process_safe")
+        self._shards: "OrderedDict[int, AttemptTracker]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._closed = False
+        os.makedirs(root, exist_ok=True)
+        self._check_layout()
+
+    def __enter__(self) -> "ShardedAttemptTracker":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _check_layout(self) -> None:
+        layout_path = os.path.join(self.root, "shards.txt")
+        try:
+            with open(layout_path, "r", encoding="utf-8") as handle:
+                recorded = int(handle.read().strip())
+        except FileNotFoundError:
+            with open(layout_path, "w", encoding="utf-8") as handle:
+                handle.write(f"{self.shard_count}\n")
+            return
+        if recorded != self.shard_count:
+            raise ValueError(
+                f"{self.root!r} was created with {recorded} shards, not {self.shard_count}."
+            )
+
+    def shard_for(self, learner_id: str) -> int:
+        """Return the shard index holding ``learner_id``'s state."""
+
+        return zlib.crc32(learner_id.encode("utf-8")) % self.shard_count
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.root, f"shard-{shard:03d}")
+
+    def _due_index_path(self, shard: int) -> str:
+        return os.path.join(self._shard_path(shard), DUE_INDEX_NAME)
+
+    def _indexed_due(self, shard: int) -> Optional[float]:
+        """Earliest due time recorded for a closed shard; ``inf`` if none is queued.
+
+        Returns ``None`` when there is no usable index, for example after a
+        crash left the shard without one, so the shard has to be opened.
+        """
+
+        try:
+            with open(self._due_index_path(shard), "r", encoding="utf-8") as handle:
+                content = handle.read().strip()
+        except FileNotFoundError:
+            return None
+        if content == "none":
+            return math.inf
+        try:
+            return float(content)
+        except ValueError:
+            return None
+
+    def _open_shard(self, shard: int) -> AttemptTracker:
+        path = self._shard_path(shard)
+        os.makedirs(path, exist_ok=True)
+        # The index goes stale as soon as the shard changes; it is rewritten
+        # when the shard is closed.
+        try:
+            os.remove(self._due_index_path(shard))
+        except FileNotFoundError:
+            pass
+        if self._storage_factory is not None:
+            return AttemptTracker(storage=self._storage_factory(path), **self._tracker_options)
+        return AttemptTracker(
+            os.path.join(path, "attempt_log.json"),
+            os.path.join(path, "review_queue.json"),
+            journal_path=os.path.join(path, "attempt_log.journal") if self.journal else None,
+            **self._tracker_options,
+        )
+
+    def _shard(self, shard: int) -> AttemptTracker:
+        # Caller holds ``self._lock``.
+        if self._closed:
+            raise RuntimeError("ShardedAttemptTracker is closed.")
+        tracker = self._shards.get(shard)
+        if tracker is not None:
+            self._shards.move_to_end(shard)
+            return tracker
+        tracker = self._open_shard(shard)
+        self._shards[shard] = tracker
+        while len(self._shards) > self.max_open_shards:
+            self._close_shard(*self._shards.popitem(last=False))
+        return tracker
+
+    def _close_shard(self, shard: int, tracker: AttemptTracker) -> None:
+        if not self._use_due_index:
+            tracker.close()
+            return
+        earliest = tracker.get_due_entries(_FAR_FUTURE, limit=1)
+        tracker.close()
+        with open(self._due_index_path(shard), "w", encoding="utf-8") as handle:
+            handle.write(f"{earliest[0][0]!r}\n" if earliest else "none\n")
+
+    def _stored_shards(self) -> List[int]:
+        shards = set(self._shards)
+        for shard in range(self.shard_count):
+            if shard not in shards and os.path.isdir(self._shard_path(shard)):
+                shards.add(shard)
+        return sorted(shards)
+
+    @property
+    def open_shards(self) -> List[int]:
+        """Shard indices currently in memory, least recently used first."""
+
+        with self._lock:
+            return list(self._shards)
+
+    def record_attempt(
+        self,
+        learner_id: str,
+        question_id: str,
+        correct: bool,
+        timestamp: Optional[datetime] = None,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> Optional[str]:
+        key = _composite_key(learner_id, question_id)
+        with self._lock:
+            return self._shard(self.shard_for(learner_id)).record_attempt(
+                key, correct, timestamp, metadata
+            )
+
+    def record_attempts(
+        self,
+        learner_id: str,
+        attempts: Iterable[Union[AttemptOutcome, Mapping[str, object]]],
+    ) -> int:
+        """Record a batch of one learner's attempts; see :meth:`AttemptTracker.record_attempts`."""
+
+        outcomes = []
+        for attempt in attempts:
+            if not isinstance(attempt, AttemptOutcome):
+                attempt = AttemptOutcome.from_dict(attempt)
+            outcomes.append(
+                AttemptOutcome(
+                    _composite_key(learner_id, attempt.question_id),
+                    attempt.correct,
+                    attempt.timestamp,
+                    attempt.metadata,
+                )
+            )
+        with self._lock:
+            return self._shard(self.shard_for(learner_id)).record_attempts(outcomes)
+
+    def get_attempts(self, learner_id: str, question_id: str) -> List[Dict[str, object]]:
+        key = _composite_key(learner_id, question_id)
+        with self._lock:
+            return self._shard(self.shard_for(learner_id)).get_attempts(key)
+
+    def get_next_review(self, learner_id: str, question_id: str) -> Optional[str]:
+        key = _composite_key(learner_id, question_id)
+        with self._lock:
+            return self._shard(self.shard_for(learner_id)).get_next_review(key)
+
+    def get_items_for_export(
+        self, current_time: Optional[datetime] = None, limit: Optional[int] = None
+    ) -> List[LearnerItem]:
+        """Return ``(learner_id, question_id)`` pairs due by ``current_time``.
+
+        Closed shards whose due index shows nothing due are skipped without
+        being opened. The result is sorted by learner and then question. With
+        a ``limit`` each shard contributes at most its ``limit`` earliest-due
+        items, and the per-shard queues are merged on due time so only the
+        ``limit`` earliest-due pairs overall are returned.
+        """
+
+        if current_time is None:
+            current_time = datetime.now(timezone.utc)
+        elif current_time.tzinfo is None:
+            current_time = current_time.replace(tzinfo=timezone.utc)
+        cutoff = current_time.timestamp()
+        with self._lock:
+            per_shard: List[List[Tuple[float, str]]] = []
+            for shard in self._stored_shards():
+                if self._use_due_index and shard not in self._shards:
+                    earliest = self._indexed_due(shard)
+                    if earliest is not None and earliest > cutoff:
+                        continue
+                due = self._shard(shard).get_due_entries(current_time, limit)
+                if due:
+                    per_shard.append(due)
+
+        entries: Iterable[Tuple[float, str]] = heapq.merge(*per_shard)
+        if limit is not None:
+            entries = islice(entries, limit)
+        return [_split_key(key) for key in sorted(key for _, key in entries)]
+
+    def mark_exported(self, items: Iterable[LearnerItem]) -> None:
+        by_shard: Dict[int, List[str]] = {}
+        for learner_id, question_id in items:
+            by_shard.setdefault(self.shard_for(learner_id), []).append(
+                _composite_key(learner_id, question_id)
+            )
+        with self._lock:
+            for shard, keys in by_shard.items():
+                self._shard(shard).mark_exported(keys)
+
+    def flush(self) -> None:
+        """Write buffered changes of every open shard."""
+
+        with self._lock:
+            for tracker in self._shards.values():
+                tracker.flush()
+
+    def close(self) -> None:
+        """Close every open shard, flushing buffered changes."""
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            while self._shards:
+                self._close_shard(*self._shards.popitem(last=False))
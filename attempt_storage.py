@@ -0,0 +1,915 @@
+"""Storage backends for :class:`attempt_tracking.AttemptTracker`."""
+import heapq
+import json
+from array import array
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+    import msvcrt
+
+
+def _load_json(path: str, default):
+    if not os.path.exists(path):
+        return default.copy() if isinstance(default, dict) else list(default)
+    with open(path, "r", encoding="utf-8") as handle:
+        try:
+            return json.load(handle)
+        except json.JSONDecodeError:
+            return default.copy() if isinstance(default, dict) else list(default)
+
+
+def _save_json(path: str, payload) -> None:
+    """Write ``payload`` to ``path`` atomically via a temporary file and rename."""
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory or None, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2, ensure_ascii=False)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _read_journal(path: str, offset: int = 0) -> Tuple[List[Dict[str, object]], int]:
+    """Read journal events starting at byte ``offset``.
+
+    Returns the events and the offset just past the last complete line. A
+    torn final line left by a crash is not consumed, and undecodable lines are
+    skipped.
+    """
+
+    if not os.path.exists(path):
+        return [], 0
+    events: List[Dict[str, object]] = []
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        for raw_line in handle:
+            if not raw_line.endswith(b"\n"):
+                break
+            offset += len(raw_line)
+            line = raw_line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if isinstance(event, dict):
+                events.append(event)
+    return events, offset
+
+
+def _append_journal(path: str, events: List[Dict[str, object]]) -> int:
+    """Append ``events`` to the journal and return the number of bytes written."""
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    payload = "".join(
+        json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n" for event in events
+    ).encode("utf-8")
+    with open(path, "ab") as handle:
+        handle.write(payload)
+        handle.flush()
+    return len(payload)
+
+
+_LOCK_COUNTERS = struct.Struct("<QQ")
+
+
+class _InterProcessLock:
+    """Advisory OS lock on ``path``, shared or exclusive (exclusive on Windows).
+
+    The lock file also stores two counters maintained by writers: the number
+    of commits and the number of snapshot rewrites. Comparing them with the
+    values seen last tells a process whether, and how much, to reload.
+    """
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self._handle = os.fdopen(os.open(path, flags), "r+b")
+
+    @contextmanager
+    def hold(self, *, shared: bool = False) -> Iterator[None]:
+        fileno = self._handle.fileno()
+        if fcntl is not None:
+            fcntl.flock(fileno, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fileno, fcntl.LOCK_UN)
+            return
+        # pragma: no cover - Windows
+        self._handle.seek(0)
+        while True:
+            try:
+                msvcrt.locking(fileno, msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                continue
+        try:
+            yield
+        finally:
+            self._handle.seek(0)
+            msvcrt.locking(fileno, msvcrt.LK_UNLCK, 1)
+
+    def read_counters(self) -> Tuple[int, int]:
+        self._handle.seek(0)
+        payload = self._handle.read(_LOCK_COUNTERS.size)
+        if len(payload) < _LOCK_COUNTERS.size:
+            return 0, 0
+        return _LOCK_COUNTERS.unpack(payload)
+
+    def write_counters(self, counters: Tuple[int, int]) -> None:
+        self._handle.seek(0)
+        self._handle.write(_LOCK_COUNTERS.pack(*counters))
+        self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def _review_epoch(revisit_iso: str) -> float:
+    """Return ``revisit_iso`` as epoch seconds; unreadable times are always due."""
+
+    try:
+        revisit_time = datetime.fromisoformat(revisit_iso)
+    except (TypeError, ValueError):
+        return float("-inf")
+    if revisit_time.tzinfo is None:
+        revisit_time = revisit_time.replace(tzinfo=timezone.utc)
+    return revisit_time.timestamp()
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _iso_to_micros(timestamp: object) -> Optional[int]:
+    """Return epoch microseconds for an aware ISO-8601 string, else ``None``."""
+
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        return None
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def _micros_to_iso(micros: int) -> str:
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+class _QuestionRecord:
+    """Compact attempt history for one question.
+
+    Attempts live in parallel arrays of epoch microseconds and correctness
+    flags, with running counters so scheduling never rescans the history.
+    Metadata is stored sparsely by attempt index. Attempts that would not
+    round-trip exactly through this form (a non-UTC timestamp, extra keys)
+    keep their original dict in ``irregular``.
+    """
+
+    __slots__ = (
+        "timestamps",
+        "outcomes",
+        "correct_count",
+        "incorrect_count",
+        "metadata",
+        "irregular",
+        "next_review",
+    )
+
+    def __init__(self) -> None:
+        self.timestamps = array("q")
+        self.outcomes = bytearray()
+        self.correct_count = 0
+        self.incorrect_count = 0
+        self.metadata: Optional[Dict[int, object]] = None
+        self.irregular: Optional[Dict[int, Dict[str, object]]] = None
+        self.next_review: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def append(self, attempt: Dict[str, object]) -> None:
+        index = len(self.outcomes)
+        correct = bool(attempt.get("correct", False))
+        timestamp = attempt.get("timestamp")
+        micros = _iso_to_micros(timestamp)
+        regular = (
+            micros is not None
+            and _micros_to_iso(micros) == timestamp
+            and attempt.get("correct") is correct
+            and attempt.keys() <= {"timestamp", "correct", "metadata"}
+        )
+        self.timestamps.append(micros if micros is not None else 0)
+        self.outcomes.append(1 if correct else 0)
+        if correct:
+            self.correct_count += 1
+        else:
+            self.incorrect_count += 1
+        if not regular:
+            if self.irregular is None:
+                self.irregular = {}
+            self.irregular[index] = dict(attempt)
+        elif attempt.get("metadata"):
+            if self.metadata is None:
+                self.metadata = {}
+            self.metadata[index] = attempt["metadata"]
+
+    def attempt(self, index: int) -> Dict[str, object]:
+        if self.irregular is not None and index in self.irregular:
+            return dict(self.irregular[index])
+        entry: Dict[str, object] = {
+            "timestamp": _micros_to_iso(self.timestamps[index]),
+            "correct": bool(self.outcomes[index]),
+        }
+        if self.metadata is not None and index in self.metadata:
+            entry["metadata"] = self.metadata[index]
+        return entry
+
+    def attempts(self) -> List[Dict[str, object]]:
+        return [self.attempt(index) for index in range(len(self.outcomes))]
+
+    def to_payload(self) -> Dict[str, object]:
+        return {"attempts": self.attempts(), "next_review": self.next_review}
+
+    def copy(self) -> "_QuestionRecord":
+        """Return an independent copy; the arrays are copied without decoding."""
+
+        record = _QuestionRecord()
+        record.timestamps = array("q", self.timestamps)
+        record.outcomes = bytearray(self.outcomes)
+        record.correct_count = self.correct_count
+        record.incorrect_count = self.incorrect_count
+        record.metadata = dict(self.metadata) if self.metadata is not None else None
+        record.irregular = dict(self.irregular) if self.irregular is not None else None
+        record.next_review = self.next_review
+        return record
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, object]) -> "_QuestionRecord":
+        record = cls()
+        for attempt in payload.get("attempts", []) or []:
+            record.append(attempt)
+        record.next_review = payload.get("next_review")
+        return record
+
+
+class AttemptStorage:
+    """Interface implemented by attempt tracker storage backends.
+
+    Mutating calls may be buffered; :meth:`commit` makes them durable. The
+    tracker owns all scheduling decisions and hands the backend ready-made
+    attempt entries and ISO-8601 review times.
+    """
+
+    def append_attempt(
+        self, question_id: str, attempt: Dict[str, object], next_review: Optional[str]
+    ) -> None:
+        """Record ``attempt`` and set the question's next review.
+
+        A ``next_review`` of ``None`` clears the review and drops the question
+        from the queue; otherwise the question is (re)queued for that time.
+        """
+
+        raise NotImplementedError
+
+    def count_incorrect(self, question_id: str) -> int:
+        raise NotImplementedError
+
+    def get_attempts(self, question_id: str) -> List[Dict[str, object]]:
+        raise NotImplementedError
+
+    def get_next_review(self, question_id: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def due_items(self, now: datetime, limit: Optional[int] = None) -> List[str]:
+        """Return queued question ids due at or before ``now``, sorted.
+
+        With a ``limit``, only the ``limit`` earliest-due questions are
+        returned (still sorted by id).
+        """
+
+        return sorted(question_id for _, question_id in self.due_entries(now, limit))
+
+    def due_entries(self, now: datetime, limit: Optional[int] = None) -> List[Tuple[float, str]]:
+        """Return ``(due_at, question_id)`` for questions due at or before ``now``.
+
+        ``due_at`` is in epoch seconds. Entries are ordered by due time and
+        then id; with a ``limit``, only the first ``limit`` are returned.
+        """
+
+        raise NotImplementedError
+
+    def remove_from_queue(self, question_ids: Iterable[str]) -> List[str]:
+        """Dequeue ``question_ids`` and return the ones that were queued."""
+
+        raise NotImplementedError
+
+    def iter_histories(self) -> Iterator[Tuple[str, Sequence[int], Sequence[int]]]:
+        """Yield ``(question_id, epoch_micros, correct_flags)`` per question.
+
+        Both sequences are in attempt order; flags are 1 for a correct attempt.
+        """
+
+        raise NotImplementedError
+
+    def due_times(self) -> List[float]:
+        """Return the due time of every queued question as epoch seconds."""
+
+        raise NotImplementedError
+
+    def commit(self) -> None:
+        raise NotImplementedError
+
+    def prepare_commit(self) -> None:
+        """Detach buffered changes for a later :meth:`write_prepared`.
+
+        Called with the tracker lock held, so it should only capture what
+        needs writing. Backends without a cheaper split simply commit here.
+        """
+
+        self.commit()
+
+    def write_prepared(self) -> None:
+        """Write changes detached by :meth:`prepare_commit`, in order.
+
+        Called without the tracker lock; a failed write stays queued and is
+        retried by the next call.
+        """
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Hold exclusive access while the tracker reads and then changes state.
+
+        Backends shared between processes lock here and pick up changes made
+        by other writers before the body runs.
+        """
+
+        yield
+
+    def refresh(self) -> None:
+        """Pick up changes written by other processes before a read."""
+
+    def compact(self) -> None:
+        """Reorganise on-disk state; a no-op for backends that do not need it."""
+
+    def close(self) -> None:
+        self.commit()
+
+
+class JsonAttemptStorage(AttemptStorage):
+    """Keep attempts in memory and persist them as JSON files.
+
+    By default every commit rewrites ``log_path`` and ``queue_path``. When a
+    ``journal_path`` is given, changes are instead appended to that journal as
+    one JSON event per line, and the two JSON files become a snapshot that is
+    rewritten atomically every ``compact_every`` events. On startup the
+    journal is replayed on top of the snapshot.
+
+    In memory each question is a compact :class:`_QuestionRecord`; the JSON
+    files keep the familiar dict-per-attempt shape.
+
+    Queued questions are also indexed by due time in a min-heap of epoch
+    seconds. Superseded heap entries are skipped lazily, so fetching ``k`` due
+    items costs ``O(k log n)`` instead of parsing the whole queue.
+
+    With ``process_safe`` several processes may share the same files: writes
+    hold an exclusive OS lock on ``<log_path>.lock`` and reads a shared one.
+    Writers bump sequence numbers kept in the lock file, so a process only
+    reloads when another one has committed; if the snapshot is unchanged, the
+    journal is replayed from where this process left off instead.
+
+    :meth:`prepare_commit` captures the changes to write (copies of the
+    compact records, or the pending journal events) and queues a writer for
+    them; :meth:`write_prepared` runs the queued writers in order under a
+    separate write lock, so building the JSON payload, serialising and
+    syncing never need the tracker lock. A queued snapshot covers every
+    change before it, so it replaces the writers still waiting.
+    """
+
+    def __init__(
+        self,
+        log_path: str = "attempt_log.json",
+        queue_path: str = "review_queue.json",
+        journal_path: Optional[str] = None,
+        compact_every: int = 1000,
+        process_safe: bool = False,
+    ) -> None:
+        self.log_path = log_path
+        self.queue_path = queue_path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self._file_lock = _InterProcessLock(f"{log_path}.lock") if process_safe else None
+        # Queued ``(is_snapshot, writer)`` pairs, guarded by ``_queue_lock``.
+        self._unwritten: Deque[Tuple[bool, Callable[[], None]]] = deque()
+        self._queue_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # (commits, snapshot rewrites) as last seen in the lock file.
+        self._seen_counters = (0, 0)
+        if self._file_lock is None:
+            self._load()
+        else:
+            with self._file_lock.hold(shared=True):
+                self._seen_counters = self._file_lock.read_counters()
+                self._load()
+
+    def _load(self) -> None:
+        self._log: Dict[str, _QuestionRecord] = {
+            question_id: _QuestionRecord.from_payload(payload)
+            for question_id, payload in _load_json(self.log_path, {}).items()
+        }
+        self._queue: Dict[str, str] = _load_json(self.queue_path, {})
+        self._rebuild_due_index()
+        self._dirty = False
+        self._pending_events: List[Dict[str, object]] = []
+        self._journal_length = 0
+        self._journal_offset = 0
+        if self.journal_path is not None:
+            self._replay_journal()
+
+    def _replay_journal(self) -> None:
+        assert self.journal_path is not None
+        events, self._journal_offset = _read_journal(self.journal_path, self._journal_offset)
+        for event in events:
+            self._apply_event(event)
+        self._journal_length += len(events)
+        if os.path.exists(self.journal_path) and (
+            os.path.getsize(self.journal_path) > self._journal_offset
+        ):
+            # Drop a line torn by a crashed writer so new events start cleanly.
+            os.truncate(self.journal_path, self._journal_offset)
+
+    def _sync_from_disk(self) -> None:
+        assert self._file_lock is not None
+        counters = self._file_lock.read_counters()
+        if counters == self._seen_counters:
+            return
+        if counters[1] != self._seen_counters[1] or self.journal_path is None:
+            self._load()
+        else:
+            self._replay_journal()
+        self._seen_counters = counters
+
+    def _bump_counters(self, *, snapshot: bool) -> None:
+        if self._file_lock is None:
+            return
+        commits, snapshots = self._file_lock.read_counters()
+        self._seen_counters = (commits + 1, snapshots + 1 if snapshot else snapshots)
+        self._file_lock.write_counters(self._seen_counters)
+
+    def _rebuild_due_index(self) -> None:
+        self._due_at: Dict[str, float] = {
+            question_id: _review_epoch(revisit_iso)
+            for question_id, revisit_iso in self._queue.items()
+        }
+        self._due_heap: List[Tuple[float, str]] = [
+            (due_at, question_id) for question_id, due_at in self._due_at.items()
+        ]
+        heapq.heapify(self._due_heap)
+
+    def _index_due(self, question_id: str, next_review: Optional[str]) -> None:
+        if next_review is None:
+            self._due_at.pop(question_id, None)
+            return
+        due_at = _review_epoch(next_review)
+        if self._due_at.get(question_id) == due_at:
+            return
+        self._due_at[question_id] = due_at
+        heapq.heappush(self._due_heap, (due_at, question_id))
+        if len(self._due_heap) > 2 * len(self._due_at) + 64:
+            self._rebuild_due_index()
+
+    def _apply_event(self, event: Dict[str, object]) -> None:
+        """Replay a journal event; events already in the snapshot are no-ops."""
+
+        op = event.get("op")
+        if op == "attempt":
+            question_id = str(event["question_id"])
+            record = self._record(question_id)
+            if len(record) <= int(event.get("seq", len(record))):
+                record.append(event["attempt"])
+            self._set_next_review(question_id, event.get("next_review"))
+        elif op == "dequeue":
+            for question_id in event.get("question_ids", []):
+                self._queue.pop(str(question_id), None)
+                self._index_due(str(question_id), None)
+
+    def _record(self, question_id: str) -> _QuestionRecord:
+        record = self._log.get(question_id)
+        if record is None:
+            record = self._log[question_id] = _QuestionRecord()
+        return record
+
+    def _set_next_review(self, question_id: str, next_review: Optional[str]) -> None:
+        self._record(question_id).next_review = next_review
+        if next_review is None:
+            self._queue.pop(question_id, None)
+        else:
+            self._queue[question_id] = next_review
+        self._index_due(question_id, next_review)
+
+    def append_attempt(
+        self, question_id: str, attempt: Dict[str, object], next_review: Optional[str]
+    ) -> None:
+        record = self._record(question_id)
+        record.append(attempt)
+        self._set_next_review(question_id, next_review)
+        self._dirty = True
+        if self.journal_path is not None:
+            self._pending_events.append(
+                {
+                    "op": "attempt",
+                    "question_id": question_id,
+                    "seq": len(record) - 1,
+                    "attempt": attempt,
+                    "next_review": next_review,
+                }
+            )
+
+    def count_incorrect(self, question_id: str) -> int:
+        record = self._log.get(question_id)
+        return record.incorrect_count if record is not None else 0
+
+    def get_attempts(self, question_id: str) -> List[Dict[str, object]]:
+        record = self._log.get(question_id)
+        return record.attempts() if record is not None else []
+
+    def get_next_review(self, question_id: str) -> Optional[str]:
+        record = self._log.get(question_id)
+        return record.next_review if record is not None else None
+
+    def due_entries(self, now: datetime, limit: Optional[int] = None) -> List[Tuple[float, str]]:
+        cutoff = now.timestamp()
+        heap = self._due_heap
+        seen: Set[str] = set()
+        live: List[Tuple[float, str]] = []
+        while heap and heap[0][0] <= cutoff and (limit is None or len(live) < limit):
+            entry = heapq.heappop(heap)
+            due_at, question_id = entry
+            if question_id in seen or self._due_at.get(question_id) != due_at:
+                # Superseded or dequeued since this entry was pushed.
+                continue
+            seen.add(question_id)
+            live.append(entry)
+        for entry in live:
+            heapq.heappush(heap, entry)
+        return live
+
+    def remove_from_queue(self, question_ids: Iterable[str]) -> List[str]:
+        removed: List[str] = []
+        for question_id in question_ids:
+            if question_id in self._queue:
+                del self._queue[question_id]
+                self._due_at.pop(question_id, None)
+                removed.append(question_id)
+        if removed:
+            self._dirty = True
+            if self.journal_path is not None:
+                self._pending_events.append({"op": "dequeue", "question_ids": removed})
+        return removed
+
+    def iter_histories(self) -> Iterator[Tuple[str, Sequence[int], Sequence[int]]]:
+        for question_id, record in self._log.items():
+            if len(record):
+                yield question_id, record.timestamps, record.outcomes
+
+    def due_times(self) -> List[float]:
+        return list(self._due_at.values())
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        if self._file_lock is None:
+            yield
+            return
+        with self._file_lock.hold():
+            self._sync_from_disk()
+            yield
+
+    def refresh(self) -> None:
+        if self._file_lock is None:
+            return
+        with self._file_lock.hold(shared=True):
+            self._sync_from_disk()
+
+    def commit(self) -> None:
+        self.prepare_commit()
+        self.write_prepared()
+
+    def prepare_commit(self) -> None:
+        if not self._dirty:
+            return
+        if self.journal_path is None:
+            self._queue_writer(self._snapshot_writer(), snapshot=True)
+        elif self._journal_length + len(self._pending_events) >= self.compact_every:
+            # The snapshot already includes the pending events.
+            self._queue_writer(self._compaction_writer(), snapshot=True)
+            self._journal_length = 0
+        else:
+            events = self._pending_events
+            journal_path = self.journal_path
+
+            def write_events() -> None:
+                self._journal_offset += _append_journal(journal_path, events)
+                self._bump_counters(snapshot=False)
+
+            self._queue_writer(write_events, snapshot=False)
+            self._journal_length += len(events)
+        self._pending_events = []
+        self._dirty = False
+
+    def write_prepared(self) -> None:
+        with self._write_lock:
+            self._write_unwritten()
+
+    def _queue_writer(self, writer: Callable[[], None], *, snapshot: bool) -> None:
+        with self._queue_lock:
+            if snapshot:
+                # Everything still waiting is covered by the newer snapshot.
+                self._unwritten.clear()
+            self._unwritten.append((snapshot, writer))
+
+    def _write_unwritten(self) -> None:
+        # Caller holds ``self._write_lock``.
+        while True:
+            with self._queue_lock:
+                if not self._unwritten:
+                    return
+                entry = self._unwritten.popleft()
+            try:
+                entry[1]()
+            except BaseException:
+                with self._queue_lock:
+                    # Retry first next time, unless a newer snapshot that was
+                    # queued meanwhile already covers it.
+                    if not any(snapshot for snapshot, _ in self._unwritten):
+                        self._unwritten.appendleft(entry)
+                raise
+
+    def _snapshot_writer(self) -> Callable[[], None]:
+        # Only cheap copies are taken here; the payload is built by the writer.
+        records = [(question_id, record.copy()) for question_id, record in self._log.items()]
+        queue = dict(self._queue)
+
+        def write_snapshot() -> None:
+            _save_json(
+                self.log_path,
+                {question_id: record.to_payload() for question_id, record in records},
+            )
+            _save_json(self.queue_path, queue)
+            self._bump_counters(snapshot=True)
+
+        return write_snapshot
+
+    def _compaction_writer(self) -> Callable[[], None]:
+        write_snapshot = self._snapshot_writer()
+        journal_path = self.journal_path
+
+        def write_compaction() -> None:
+            write_snapshot()
+            if journal_path is not None:
+                with open(journal_path, "wb"):
+                    pass
+            self._journal_offset = 0
+
+        return write_compaction
+
+    def close(self) -> None:
+        self.commit()
+        if self._file_lock is not None:
+            self._file_lock.close()
+
+    def compact(self) -> None:
+        """Fold the journal into the JSON snapshot and start a fresh journal.
+
+        The snapshot is written atomically before the journal is truncated.
+        Replaying events that are already in the snapshot is harmless, so a
+        crash between the two steps loses nothing.
+        """
+
+        self._queue_writer(self._compaction_writer(), snapshot=True)
+        self._pending_events = []
+        self._dirty = False
+        self._journal_length = 0
+        self.write_prepared()
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS attempts_by_question ON attempts (question_id, correct);
+CREATE TABLE IF NOT EXISTS questions (
+    question_id TEXT PRIMARY KEY,
+    next_review TEXT
+);
+CREATE TABLE IF NOT EXISTS review_queue (
+    question_id TEXT PRIMARY KEY,
+    due_at REAL NOT NULL,
+    due_iso TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS review_queue_by_due ON review_queue (due_at);
+"""
+
+
+class SQLiteAttemptStorage(AttemptStorage):
+    """Store attempts in SQLite so lookups and due-time scans use indexes.
+
+    Review times are kept both as the ISO-8601 strings the tracker returns and
+    as epoch seconds in ``review_queue.due_at``, which backs the due-time index.
+    Each tracker transaction runs under ``BEGIN IMMEDIATE``, so processes
+    sharing the database serialise their writes and always read current data.
+    """
+
+    def __init__(self, database_path: str = "attempts.sqlite3", timeout: float = 30.0) -> None:
+        self.database_path = database_path
+        directory = os.path.dirname(database_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(
+            database_path, timeout=timeout, check_same_thread=False
+        )
+        self._connection.executescript(_SQLITE_SCHEMA)
+        self._connection.commit()
+
+    def _set_next_review(self, question_id: str, next_review: Optional[str]) -> None:
+        self._connection.execute(
+            "INSERT INTO questions (question_id, next_review) VALUES (?, ?) "
+            "ON CONFLICT (question_id) DO UPDATE SET next_review = excluded.next_review",
+            (question_id, next_review),
+        )
+        if next_review is None:
+            self._connection.execute(
+                "DELETE FROM review_queue WHERE question_id = ?", (question_id,)
+            )
+            return
+        due_at = _review_epoch(next_review)
+        self._connection.execute(
+            "INSERT INTO review_queue (question_id, due_at, due_iso) VALUES (?, ?, ?) "
+            "ON CONFLICT (question_id) DO UPDATE SET "
+            "due_at = excluded.due_at, due_iso = excluded.due_iso",
+            (question_id, due_at, next_review),
+        )
+
+    def _insert_attempt(self, question_id: str, attempt: Dict[str, object]) -> None:
+        metadata = attempt.get("metadata")
+        self._connection.execute(
+            "INSERT INTO attempts (question_id, timestamp, correct, metadata) VALUES (?, ?, ?, ?)",
+            (
+                question_id,
+                str(attempt.get("timestamp", "")),
+                1 if attempt.get("correct", False) else 0,
+                json.dumps(metadata, ensure_ascii=False) if metadata else None,
+            ),
+        )
+
+    def append_attempt(
+        self, question_id: str, attempt: Dict[str, object], next_review: Optional[str]
+    ) -> None:
+        self._insert_attempt(question_id, attempt)
+        self._set_next_review(question_id, next_review)
+
+    def count_incorrect(self, question_id: str) -> int:
+        row = self._connection.execute(
+            "SELECT COUNT(*) FROM attempts WHERE question_id = ? AND correct = 0",
+            (question_id,),
+        ).fetchone()
+        return int(row[0])
+
+    def get_attempts(self, question_id: str) -> List[Dict[str, object]]:
+        rows = self._connection.execute(
+            "SELECT timestamp, correct, metadata FROM attempts WHERE question_id = ? ORDER BY id",
+            (question_id,),
+        )
+        attempts: List[Dict[str, object]] = []
+        for timestamp, correct, metadata in rows:
+            attempt: Dict[str, object] = {"timestamp": timestamp, "correct": bool(correct)}
+            if metadata:
+                attempt["metadata"] = json.loads(metadata)
+            attempts.append(attempt)
+        return attempts
+
+    def get_next_review(self, question_id: str) -> Optional[str]:
+        row = self._connection.execute(
+            "SELECT next_review FROM questions WHERE question_id = ?", (question_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def due_entries(self, now: datetime, limit: Optional[int] = None) -> List[Tuple[float, str]]:
+        rows = self._connection.execute(
+            "SELECT due_at, question_id FROM review_queue WHERE due_at <= ? "
+            "ORDER BY due_at, question_id LIMIT ?",
+            (now.timestamp(), -1 if limit is None else limit),
+        )
+        return [(due_at, question_id) for due_at, question_id in rows]
+
+    def remove_from_queue(self, question_ids: Iterable[str]) -> List[str]:
+        removed: List[str] = []
+        for question_id in question_ids:
+            cursor = self._connection.execute(
+                "DELETE FROM review_queue WHERE question_id = ?", (question_id,)
+            )
+            if cursor.rowcount:
+                removed.append(question_id)
+        return removed
+
+    def iter_histories(self) -> Iterator[Tuple[str, Sequence[int], Sequence[int]]]:
+        rows = self._connection.execute(
+            "SELECT question_id, timestamp, correct FROM attempts ORDER BY question_id, id"
+        )
+        for question_id, group in groupby(rows, key=lambda row: row[0]):
+            timestamps = array("q")
+            outcomes = bytearray()
+            for _, timestamp, correct in group:
+                micros = _iso_to_micros(timestamp)
+                timestamps.append(micros if micros is not None else 0)
+                outcomes.append(1 if correct else 0)
+            yield question_id, timestamps, outcomes
+
+    def due_times(self) -> List[float]:
+        return [row[0] for row in self._connection.execute("SELECT due_at FROM review_queue")]
+
+    def import_json(
+        self,
+        log_path: str = "attempt_log.json",
+        queue_path: str = "review_queue.json",
+        journal_path: Optional[str] = None,
+    ) -> int:
+        """Import attempts and the review queue from the JSON file format.
+
+        Intended for migrating an existing tracker into an empty database. Pass
+        the tracker's ``journal_path`` if it used one, so journaled changes
+        that are not yet compacted into the JSON files are imported too.
+        Returns the number of attempts imported.
+        """
+
+        source = JsonAttemptStorage(log_path, queue_path, journal_path)
+        imported = 0
+        with self._connection:
+            for question_id, record in source._log.items():
+                for attempt in record.attempts():
+                    self._insert_attempt(question_id, attempt)
+                    imported += 1
+                self._connection.execute(
+                    "INSERT INTO questions (question_id, next_review) VALUES (?, ?) "
+                    "ON CONFLICT (question_id) DO UPDATE SET next_review = excluded.next_review",
+                    (question_id, record.next_review),
+                )
+            for question_id, revisit_iso in source._queue.items():
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO review_queue (question_id, due_at, due_iso) "
+                    "VALUES (?, ?, ?)",
+                    (question_id, _review_epoch(revisit_iso), revisit_iso),
+                )
+        return imported
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.rollback()
+            raise
+        self._connection.commit()
+
+    def commit(self) -> None:
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.commit()
+        self._connection.close()
@@ -1,26 +1,13 @@
 import json
-import os
+import threading
+import time
+from array import array
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 
-
-def _load_json(path: str, default):
-    if not os.path.exists(path):
-        return default.copy() if isinstance(default, dict) else list(default)
-    with open(path, "r", encoding="utf-8") as handle:
-        try:
-            return json.load(handle)
-        except json.JSONDecodeError:
-            return default.copy() if isinstance(default, dict) else list(default)
-
-
-def _save_json(path: str, payload) -> None:
-    directory = os.path.dirname(path)
-    if directory and not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2, ensure_ascii=False)
+from attempt_storage import AttemptStorage, JsonAttemptStorage
 
 
 @dataclass
@@ -30,21 +17,108 @@ class AttemptOutcome:
     timestamp: datetime
     metadata: Optional[Dict[str, str]] = None
 
+    @classmethod
+    def from_dict(cls, payload: Mapping[str, object]) -> "AttemptOutcome":
+        """Build an outcome from a mapping with an ISO-8601 ``timestamp``."""
+
+        timestamp = payload.get("timestamp")
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        if not isinstance(timestamp, datetime):
+            raise ValueError(f"Attempt is missing a valid timestamp: {payload!r}")
+        metadata = payload.get("metadata")
+        return cls(
+            question_id=str(payload["question_id"]),
+            correct=bool(payload["correct"]),
+            timestamp=timestamp,
+            metadata=dict(metadata) if isinstance(metadata, Mapping) else None,
+        )
+
+
+def read_attempts_jsonl(path: str) -> Iterator[AttemptOutcome]:
+    """Stream :class:`AttemptOutcome` records from a JSON Lines file.
+
+    Each non-blank line holds one object with ``question_id``, ``correct``,
+    ``timestamp`` and optional ``metadata`` keys.
+    """
+
+    with open(path, "r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield AttemptOutcome.from_dict(json.loads(line))
+            except (json.JSONDecodeError, KeyError, ValueError) as exc:
+                raise ValueError(f"{path}:{line_number}: invalid attempt record") from exc
+
 
 class AttemptTracker:
-    """Persist question attempt outcomes and manage review scheduling."""
+    """Persist question attempt outcomes and manage review scheduling.
+
+    State is kept by a storage backend. By default that is a
+    :class:`~attempt_storage.JsonAttemptStorage` over ``log_path`` and
+    ``queue_path`` (journalled when ``journal_path`` is given); pass
+    ``storage`` to use another backend such as
+    :class:`~attempt_storage.SQLiteAttemptStorage`.
+
+    A tracker may be shared between threads. Set ``process_safe`` when several
+    processes record attempts into the same JSON files; the default storage
+    then coordinates them with OS file locks (see
+    :class:`~attempt_storage.JsonAttemptStorage`). The SQLite backend is
+    always safe to share.
+
+    With ``flush_interval_ms`` set, changes are written behind: each change
+    only marks the tracker dirty, and a background thread commits at most
+    every ``flush_interval_ms`` milliseconds, or sooner once
+    ``flush_after_changes`` changes are waiting. The lock is held only while
+    the changes are captured; they are serialised and written after it is
+    released. Call :meth:`flush` or :meth:`close` (or use the tracker as a
+    context manager) so nothing is lost at shutdown; a closed tracker raises
+    :class:`RuntimeError` on further changes. Write-behind keeps unflushed state private to this process,
+    so it cannot be combined with ``process_safe``.
+    """
 
     def __init__(
         self,
         log_path: str = "attempt_log.json",
         queue_path: str = "review_queue.json",
         base_interval_minutes: int = 15,
+        journal_path: Optional[str] = None,
+        compact_every: int = 1000,
+        storage: Optional[AttemptStorage] = None,
+        process_safe: bool = False,
+        flush_interval_ms: Optional[int] = None,
+        flush_after_changes: int = 100,
     ) -> None:
+        if flush_interval_ms is not None and process_safe:
+            raise ValueError("Write-behind persistence cannot be combined with process_safe.")
         self.log_path = log_path
         self.queue_path = queue_path
         self.base_interval_minutes = base_interval_minutes
-        self._log: Dict[str, Dict[str, List[Dict[str, object]]]] = _load_json(self.log_path, {})
-        self._queue: Dict[str, str] = _load_json(self.queue_path, {})
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_after_changes = flush_after_changes
+        if storage is None:
+            storage = JsonAttemptStorage(
+                log_path, queue_path, journal_path, compact_every, process_safe=process_safe
+            )
+        self._storage = storage
+        self._lock = threading.RLock()
+        self._closed = False
+        self._unflushed = 0
+        self._first_unflushed_at = 0.0
+        self._flush_condition = threading.Condition(self._lock)
+        self._flush_thread: Optional[threading.Thread] = None
+        if flush_interval_ms is not None:
+            self._flush_thread = threading.Thread(
+                target=self._flush_loop, name="attempt-tracker-flush", daemon=True
+            )
+            self._flush_thread.start()
+
+    def __enter__(self) -> "AttemptTracker":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
     @staticmethod
     def _ensure_datetime(value: Optional[datetime]) -> datetime:
@@ -54,27 +128,108 @@ class AttemptTracker:
             return value.replace(tzinfo=timezone.utc)
         return value.astimezone(timezone.utc)
 
+    @contextmanager
+    def _changing(self) -> Iterator[None]:
+        """Hold the lock and a storage transaction for a change to state."""
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("AttemptTracker is closed.")
+            with self._storage.transaction():
+                yield
+
     def _persist(self) -> None:
-        _save_json(self.log_path, self._log)
-        _save_json(self.queue_path, self._queue)
+        if self._flush_thread is None:
+            self._storage.commit()
+            return
+        self._unflushed += 1
+        if self._unflushed == 1:
+            # Wake the flush thread to start the interval timer.
+            self._first_unflushed_at = time.monotonic()
+            self._flush_condition.notify()
+        elif self._unflushed >= self.flush_after_changes:
+            self._flush_condition.notify()
+
+    def _prepare_unflushed(self) -> None:
+        # Caller holds ``self._lock``.
+        if self._unflushed:
+            self._storage.prepare_commit()
+            self._unflushed = 0
+
+    def _flush_loop(self) -> None:
+        assert self.flush_interval_ms is not None
+        interval = self.flush_interval_ms / 1000.0
+        with self._flush_condition:
+            while not self._closed:
+                if not self._unflushed:
+                    self._flush_condition.wait()
+                    continue
+                remaining = self._first_unflushed_at + interval - time.monotonic()
+                if remaining > 0 and self._unflushed < self.flush_after_changes:
+                    self._flush_condition.wait(remaining)
+                    continue
+                try:
+                    self._prepare_unflushed()
+                    # Serialise and write with the lock released, so recording
+                    # threads never wait on disk I/O.
+                    self._lock.release()
+                    try:
+                        self._storage.write_prepared()
+                    finally:
+                        self._lock.acquire()
+                except Exception:
+                    # Unwritten changes stay buffered or queued; keep the
+                    # tracker dirty so they are retried after another
+                    # interval. flush() and close() retry them too, and raise.
+                    self._unflushed = max(self._unflushed, 1)
+                    self._flush_condition.wait(interval)
+
+    def flush(self) -> None:
+        """Write any buffered changes to storage now."""
+
+        with self._lock:
+            self._prepare_unflushed()
+        self._storage.write_prepared()
+
+    def compact(self) -> None:
+        """Ask the storage backend to compact its on-disk state."""
+
+        with self._changing():
+            self._storage.compact()
+
+    def close(self) -> None:
+        """Flush buffered changes, stop the flush thread and close storage."""
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush_condition.notify_all()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+        with self._lock:
+            try:
+                self.flush()
+            finally:
+                self._storage.close()
 
     def _count_incorrect_attempts(self, question_id: str) -> int:
-        attempts = self._log.get(question_id, {}).get("attempts", [])
-        return sum(1 for attempt in attempts if not attempt.get("correct", False))
+        return self._storage.count_incorrect(question_id)
 
     def _interval_for_attempt(self, incorrect_attempts: int) -> timedelta:
         exponent = max(0, incorrect_attempts - 1)
         minutes = self.base_interval_minutes * (2 ** exponent)
         return timedelta(minutes=minutes)
 
-    def _schedule_next_review(self, question_id: str, timestamp: datetime) -> str:
-        incorrect_attempts = self._count_incorrect_attempts(question_id)
-        interval = self._interval_for_attempt(incorrect_attempts)
+    def _schedule_next_review(
+        self, question_id: str, timestamp: datetime, previous_incorrect: Optional[int] = None
+    ) -> str:
+        if previous_incorrect is None:
+            previous_incorrect = self._count_incorrect_attempts(question_id)
+        # Called before the failed attempt is stored, so count it here.
+        interval = self._interval_for_attempt(previous_incorrect + 1)
         revisit_time = timestamp + interval
-        revisit_iso = revisit_time.isoformat()
-        self._log.setdefault(question_id, {}).update({"next_review": revisit_iso})
-        self._queue[question_id] = revisit_iso
-        return revisit_iso
+        return revisit_time.isoformat()
 
     def record_attempt(
         self,
@@ -84,53 +239,142 @@ class AttemptTracker:
         metadata: Optional[Dict[str, str]] = None,
     ) -> Optional[str]:
         moment = self._ensure_datetime(timestamp)
-        attempt_entry = {
+        with self._changing():
+            next_review = self._apply_attempt(question_id, correct, moment, metadata)
+            self._persist()
+        return next_review
+
+    def record_attempts(
+        self, attempts: Iterable[Union[AttemptOutcome, Mapping[str, object]]]
+    ) -> int:
+        """Record a batch of attempts in timestamp order and persist once.
+
+        ``attempts`` may mix :class:`AttemptOutcome` instances and mappings in
+        the :meth:`AttemptOutcome.from_dict` shape, for example the output of
+        :func:`read_attempts_jsonl`. Attempts with equal timestamps keep their
+        input order. Returns the number of attempts recorded.
+        """
+
+        outcomes = [
+            attempt if isinstance(attempt, AttemptOutcome) else AttemptOutcome.from_dict(attempt)
+            for attempt in attempts
+        ]
+        moments = [self._ensure_datetime(outcome.timestamp) for outcome in outcomes]
+        if not outcomes:
+            return 0
+        order = sorted(range(len(outcomes)), key=moments.__getitem__)
+        with self._changing():
+            # Build every entry before touching storage, so a failure part way
+            # through leaves none of the batch behind.
+            incorrect_counts: Dict[str, int] = {}
+            prepared: List[Tuple[str, Dict[str, object], Optional[str]]] = []
+            for index in order:
+                outcome = outcomes[index]
+                question_id = outcome.question_id
+                previous_incorrect = incorrect_counts.get(question_id)
+                if previous_incorrect is None:
+                    previous_incorrect = self._count_incorrect_attempts(question_id)
+                attempt_entry, next_review = self._build_attempt(
+                    question_id, outcome.correct, moments[index], outcome.metadata, previous_incorrect
+                )
+                incorrect_counts[question_id] = previous_incorrect + (not outcome.correct)
+                prepared.append((question_id, attempt_entry, next_review))
+            for question_id, attempt_entry, next_review in prepared:
+                self._storage.append_attempt(question_id, attempt_entry, next_review)
+            self._persist()
+        return len(outcomes)
+
+    def _build_attempt(
+        self,
+        question_id: str,
+        correct: bool,
+        moment: datetime,
+        metadata: Optional[Dict[str, str]],
+        previous_incorrect: Optional[int] = None,
+    ) -> Tuple[Dict[str, object], Optional[str]]:
+        attempt_entry: Dict[str, object] = {
             "timestamp": moment.isoformat(),
             "correct": bool(correct),
         }
         if metadata:
             attempt_entry["metadata"] = metadata
 
-        question_log = self._log.setdefault(question_id, {"attempts": [], "next_review": None})
-        question_log.setdefault("attempts", []).append(attempt_entry)
-
         next_review: Optional[str] = None
-        if correct:
-            question_log["next_review"] = None
-            if question_id in self._queue:
-                del self._queue[question_id]
-        else:
-            next_review = self._schedule_next_review(question_id, moment)
-
-        self._persist()
+        if not correct:
+            next_review = self._schedule_next_review(question_id, moment, previous_incorrect)
+        return attempt_entry, next_review
+
+    def _apply_attempt(
+        self,
+        question_id: str,
+        correct: bool,
+        moment: datetime,
+        metadata: Optional[Dict[str, str]],
+    ) -> Optional[str]:
+        attempt_entry, next_review = self._build_attempt(question_id, correct, moment, metadata)
+        self._storage.append_attempt(question_id, attempt_entry, next_review)
         return next_review
 
-    def get_items_for_export(self, current_time: Optional[datetime] = None) -> List[str]:
+    def get_items_for_export(
+        self, current_time: Optional[datetime] = None, limit: Optional[int] = None
+    ) -> List[str]:
+        """Return question ids due for review by ``current_time``, sorted by id.
+
+        ``limit`` caps the result at the earliest-due questions, so a large
+        backlog can be exported page by page with :meth:`mark_exported`.
+        """
+
         now = self._ensure_datetime(current_time)
-        ready: List[str] = []
-        for question_id, revisit_iso in self._queue.items():
-            try:
-                revisit_time = datetime.fromisoformat(revisit_iso)
-            except ValueError:
-                revisit_time = now
-            if revisit_time.tzinfo is None:
-                revisit_time = revisit_time.replace(tzinfo=timezone.utc)
-            if revisit_time <= now:
-                ready.append(question_id)
-        ready.sort()
-        return ready
+        with self._lock:
+            self._storage.refresh()
+            return self._storage.due_items(now, limit)
+
+    def get_due_entries(
+        self, current_time: Optional[datetime] = None, limit: Optional[int] = None
+    ) -> List[Tuple[float, str]]:
+        """Return ``(due_at, question_id)`` pairs due by ``current_time``.
+
+        ``due_at`` is in epoch seconds and pairs are ordered earliest first,
+        so callers can merge the queues of several trackers.
+        """
+
+        now = self._ensure_datetime(current_time)
+        with self._lock:
+            self._storage.refresh()
+            return self._storage.due_entries(now, limit)
 
     def mark_exported(self, question_ids: Iterable[str]) -> None:
-        removed = False
-        for question_id in question_ids:
-            if question_id in self._queue:
-                del self._queue[question_id]
-                removed = True
-        if removed:
-            self._persist()
+        with self._changing():
+            if self._storage.remove_from_queue(question_ids):
+                self._persist()
 
     def get_attempts(self, question_id: str) -> List[Dict[str, object]]:
-        return list(self._log.get(question_id, {}).get("attempts", []))
+        with self._lock:
+            self._storage.refresh()
+            return self._storage.get_attempts(question_id)
 
     def get_next_review(self, question_id: str) -> Optional[str]:
-        return self._log.get(question_id, {}).get("next_review")
+        with self._lock:
+            self._storage.refresh()
+            return self._storage.get_next_review(question_id)
+
+    def attempt_histories(self) -> List[Tuple[str, array, bytearray]]:
+        """Return a copy of every question's attempt history in columnar form.
+
+        Each entry is ``(question_id, epoch_micros, correct_flags)``; see
+        :mod:`attempt_analytics` for vectorised statistics over them.
+        """
+
+        with self._lock:
+            self._storage.refresh()
+            return [
+                (question_id, array("q", timestamps), bytearray(outcomes))
+                for question_id, timestamps, outcomes in self._storage.iter_histories()
+            ]
+
+    def review_due_times(self) -> List[float]:
+        """Return the due time of every queued review as epoch seconds."""
+
+        with self._lock:
+            self._storage.refresh()
+            return self._storage.due_times()
@@ -0,0 +1,105 @@
+"""Micro-benchmark for the MathML speech-text generator.
+
+Compares the single-pass tokenizer in :mod:`mathml_conversion` against the
+previous chain of ``str.replace``/``re.sub`` passes on realistic expressions.
+The headline figure is the cold comparison: every call converts a fresh
+expression, with the memo cache bypassed. The memoized document workload is
+reported separately::
+
+    python benchmarks/bench_speech_text.py
+"""
+from __future__ import annotations
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from mathml_conversion import _latex_to_plain_text  # noqa: E402
+
+EXPRESSIONS = [
+    "E=mc^2",
+    r"a^2 + b^2 = c^2",
+    r"x = \frac{-b \pm \sqrt{b^2 - 4ac}}{2a}",
+    r"\sum_{i=1}^{n} i = \frac{n(n+1)}{2}",
+    r"\int_0^\infty e^{-x^2} dx = \frac{\sqrt{\pi}}{2}",
+    r"\lim_{x \to 0} \frac{\sin x}{x} = 1",
+    r"\alpha \leq \beta \cdot \gamma",
+    r"f(x) = \sqrt[3]{x^2 + 1} \times \frac{1}{x}",
+]
+
+
+def legacy_latex_to_plain_text(latex: str) -> str:
+    """The replacement chain that ``_latex_to_plain_text`` superseded."""
+
+    text = latex.replace("\\frac", "fraction of")
+    text = text.replace("\\times", " times ")
+    text = text.replace("\\cdot", " multiplied by ")
+    text = text.replace("\\pm", " plus or minus ")
+    text = text.replace("\\leq", " less or equal ")
+    text = text.replace("\\geq", " greater or equal ")
+    text = re.sub(r"\\sqrt\s*\{([^{}]+)\}", r"square root of \1", text)
+    text = text.replace("^", " to the power of ")
+    text = text.replace("_", " sub ")
+    text = re.sub(r"\\[A-Za-z]+", lambda m: m.group(0)[1:], text)
+    text = text.replace("{", " ").replace("}", " ")
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+# A math-heavy page mentions the same handful of expressions many times; this
+# mirrors how often each expression recurs in the sample chapters.
+DOCUMENT = [
+    expression
+    for repeats, expression in zip((40, 25, 12, 8, 6, 4, 3, 2), EXPRESSIONS)
+    for _ in range(repeats)
+]
+
+
+def _run_all(func, expressions) -> None:
+    for expression in expressions:
+        func(expression)
+
+
+def _run_document() -> None:
+    _latex_to_plain_text.cache_clear()
+    _run_all(_latex_to_plain_text, DOCUMENT)
+
+
+def _best_per_call(func, expressions, number: int, repeat: int) -> float:
+    """Fastest of ``repeat`` runs, in microseconds per expression."""
+
+    seconds = min(timeit.repeat(lambda: _run_all(func, expressions), number=number, repeat=repeat))
+    return seconds * 1e6 / (number * len(expressions))
+
+
+def main(number: int = 500, repeat: int = 7) -> None:
+    uncached = _latex_to_plain_text.__wrapped__
+    print("Cold, per distinct expression (legacy / tokenizer):")
+    legacy_total = tokenizer_total = 0.0
+    for expression in EXPRESSIONS:
+        legacy = _best_per_call(legacy_latex_to_plain_text, [expression], number, repeat)
+        tokenizer = _best_per_call(uncached, [expression], number, repeat)
+        legacy_total += legacy
+        tokenizer_total += tokenizer
+        print(f"  {legacy:6.2f} / {tokenizer:6.2f} us  {tokenizer / legacy:4.2f}x  {expression}")
+    print(
+        f"  mean {legacy_total / len(EXPRESSIONS):6.2f} / "
+        f"{tokenizer_total / len(EXPRESSIONS):6.2f} us  "
+        f"{tokenizer_total / legacy_total:4.2f}x"
+    )
+
+    legacy = _best_per_call(legacy_latex_to_plain_text, DOCUMENT, number // 10 or 1, repeat)
+    seconds = min(timeit.repeat(_run_document, number=number // 10 or 1, repeat=repeat))
+    memoized = seconds * 1e6 / ((number // 10 or 1) * len(DOCUMENT))
+    print(f"Document workload ({len(DOCUMENT)} occurrences, cache cleared per run):")
+    print(f"  legacy replace chain   {legacy:8.2f} us/expression")
+    print(f"  tokenizer (memoized)   {memoized:8.2f} us/expression")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 """MathML conversion utilities for math-heavy learning materials."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
 import re
-from typing import Callable, Iterable, Optional
+from typing import Callable, Deque, Dict, Iterable, Iterator, Optional, TextIO, Tuple, Union
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import unescape
 
 MATHML_NS = "http://www.w3.org/1998/Math/MathML"
 ET.register_namespace("", MATHML_NS)
@@ -18,30 +22,329 @@ DISPLAY_PATTERN = re.compile(
     re.DOTALL,
 )
 
+# Shape emitted by ``latex2mathml``: a single namespaced ``<math>`` root with at
+# most a ``display`` attribute and no ``<semantics>`` block of its own.
+_CONVERTER_OUTPUT_PATTERN = re.compile(
+    r'\s*<math\s+xmlns="' + re.escape(MATHML_NS) + r'"'
+    r'(?:\s+display="(?:inline|block)")?\s*>(?P<body>.*)</math>\s*',
+    re.DOTALL,
+)
+
+# Markup the fast path may splice verbatim: elements with double- or
+# single-quoted attributes, character data and predefined or numeric entity
+# references. Anything else (comments, CDATA, stray ``<``/``&``) goes through
+# ElementTree instead.
+_BODY_TOKEN_PATTERN = re.compile(
+    r"<(?P<close>/)?(?P<tag>[A-Za-z_][\w.:-]*)"
+    r"(?P<attrs>(?:\s+[A-Za-z_][\w.:-]*\s*=\s*(?:\"[^\"<&]*\"|'[^'<&]*'))*)\s*(?P<empty>/)?>"
+    r"|&(?:#[0-9]+|#x[0-9A-Fa-f]+|amp|lt|gt|quot|apos);"
+    r"|[^<&\x00-\x08\x0b\x0c\x0e-\x1f]+"
+)
+_ATTRIBUTE_NAME_PATTERN = re.compile(r"([\w.:-]+)\s*=")
+
+_MATH_OPEN_TEMPLATE = '<math xmlns="' + MATHML_NS + '" display="{display}" data-latex="{latex}">'
+_SEMANTICS_TEMPLATE = (
+    "<semantics>"
+    '<annotation encoding="application/x-tex">{latex}</annotation>'
+    '<annotation encoding="text/plain">{plain}</annotation>'
+    "</semantics>"
+)
+_FALLBACK_BODY_TEMPLATE = "<mrow><mtext>{latex}</mtext></mrow>"
+
+
+def _escape_text(value: str) -> str:
+    """Escape ``value`` for XML character data, matching ElementTree."""
+
+    if "&" in value:
+        value = value.replace("&", "&amp;")
+    if "<" in value:
+        value = value.replace("<", "&lt;")
+    if ">" in value:
+        value = value.replace(">", "&gt;")
+    return value
+
+
+def _escape_attrib(value: str) -> str:
+    """Escape ``value`` for a double-quoted XML attribute, matching ElementTree."""
+
+    value = _escape_text(value)
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    if "\r" in value:
+        value = value.replace("\r", "&#13;")
+    if "\n" in value:
+        value = value.replace("\n", "&#10;")
+    if "\t" in value:
+        value = value.replace("\t", "&#09;")
+    return value
+
+
+_ATTRIBUTE_ENTITIES = {"&quot;": '"', "&#13;": "\r", "&#10;": "\n", "&#09;": "\t"}
+
+
+def _unescape_attrib(value: str) -> str:
+    """Invert :func:`_escape_attrib`."""
+
+    return unescape(value, _ATTRIBUTE_ENTITIES)
+
+
+def _is_well_formed_body(body: str) -> bool:
+    """Cheaply check that ``body`` is balanced, simple XML content."""
+
+    open_tags = []
+    position = 0
+    for token in _BODY_TOKEN_PATTERN.finditer(body):
+        if token.start() != position:
+            return False
+        position = token.end()
+        tag = token.group("tag")
+        if tag is None:
+            continue
+        if token.group("close"):
+            if token.group("attrs") or token.group("empty"):
+                return False
+            if not open_tags or open_tags.pop() != tag:
+                return False
+            continue
+        attrs = token.group("attrs")
+        if attrs:
+            names = _ATTRIBUTE_NAME_PATTERN.findall(attrs)
+            if len(set(names)) != len(names):
+                return False
+        if not token.group("empty"):
+            open_tags.append(tag)
+    return position == len(body) and not open_tags
+
+
+def _assemble_mathml(body: str, latex: str, *, display: bool) -> str:
+    """Wrap an already-serialised MathML ``body`` with attributes and annotations."""
+
+    return (
+        _MATH_OPEN_TEMPLATE.format(
+            display="block" if display else "inline", latex=_escape_attrib(latex)
+        )
+        + body
+        + _SEMANTICS_TEMPLATE.format(
+            latex=_escape_text(latex), plain=_escape_text(_latex_to_plain_text(latex))
+        )
+        + "</math>"
+    )
+
+
+_LATEX_TOKEN_PATTERN = re.compile(r"\\(?:[A-Za-z]+|.)|\d+(?:\.\d+)?|[A-Za-z]+|\S", re.DOTALL)
+
+# Commands that read as a fixed phrase; an empty phrase means "stay silent".
+_SPOKEN_COMMANDS = {
+    "times": "times",
+    "cdot": "multiplied by",
+    "div": "divided by",
+    "pm": "plus or minus",
+    "mp": "minus or plus",
+    "leq": "less or equal",
+    "le": "less or equal",
+    "geq": "greater or equal",
+    "ge": "greater or equal",
+    "neq": "not equal to",
+    "ne": "not equal to",
+    "approx": "approximately equal to",
+    "equiv": "equivalent to",
+    "infty": "infinity",
+    "to": "to",
+    "rightarrow": "to",
+    "in": "in",
+    "sum": "sum",
+    "prod": "product",
+    "int": "integral",
+    "lim": "limit",
+    "partial": "partial",
+    "cdots": "dots",
+    "ldots": "dots",
+    "dots": "dots",
+    "left": "",
+    "right": "",
+    "displaystyle": "",
+    "quad": "",
+    "qquad": "",
+    ",": "",
+    ";": "",
+    ":": "",
+    "!": "",
+    " ": "",
+    "\\": "",
+}
+
+# Single characters that read better as words.
+_SPOKEN_SYMBOLS = {
+    "=": "equals",
+    "+": "plus",
+    "-": "minus",
+    "<": "less than",
+    ">": "greater than",
+}
+
+# Commands whose single argument is read verbatim, without the command name.
+_TRANSPARENT_COMMANDS = frozenset(
+    {"text", "mathrm", "mathit", "mathbf", "mathsf", "mathcal", "operatorname"}
+)
 
+_NAMED_ROOTS = {"2": "square root", "3": "cube root"}
+
+# Commands that consume arguments, with their arity (``^`` and ``_`` take one).
+_STRUCTURAL_ARITY = {"frac": 2, "dfrac": 2, "tfrac": 2, "binom": 2, "sqrt": 1}
+_STRUCTURAL_ARITY.update(dict.fromkeys(_TRANSPARENT_COMMANDS, 1))
+_STRUCTURAL_LEADS = frozenset("\\{}]^_")
+
+
+def _root_label(degree: Optional[list[str]]) -> str:
+    if not degree:
+        return "square root"
+    return _NAMED_ROOTS.get(" ".join(degree)) or " ".join(["root", *degree])
+
+
+def _speak_structure(kind: str, args: list[list[str]], degree: list[str]) -> list[str]:
+    """Read a completed structural command from its spoken arguments."""
+
+    if kind == "^" or kind == "sqrt":
+        (operand,) = args
+        if kind == "^":
+            label, suffix = "to the power of", "end power"
+        else:
+            label, suffix = f"{_root_label(degree)} of", "end root"
+        if len(operand) > 1:
+            return [label, *operand, suffix]
+        return [label, *operand]
+    if kind == "_":
+        return ["sub", *args[0]]
+    if kind == "binom":
+        return ["binomial", *args[0], "choose", *args[1]]
+    if kind in _TRANSPARENT_COMMANDS:
+        return args[0]
+    numerator, denominator = args
+    if len(numerator) > 1 or len(denominator) > 1:
+        return ["fraction", *numerator, "over", *denominator, "end fraction"]
+    return [*numerator, "over", *denominator]
+
+
+def _speak_open_frames(words: list[str], stack: list[list]) -> None:
+    """Announce structures left open by truncated input, innermost first."""
+
+    while stack:
+        kind, start, args, degree = stack.pop()
+        if kind == "[":
+            # An unterminated root degree still labels its root.
+            stack[-1][3] = words[start:]
+            del words[start:]
+        elif args is None or kind in _TRANSPARENT_COMMANDS:
+            continue
+        elif kind == "sqrt":
+            label = _root_label(degree)
+            words.insert(start, f"{label} of" if len(words) > start else label)
+        elif kind == "^" or kind == "_":
+            words.insert(start, "to the power of" if kind == "^" else "sub")
+        else:
+            if args and len(words) > args[0]:
+                words.insert(args[0], "choose" if kind == "binom" else "over")
+            words.insert(start, "binomial" if kind == "binom" else "fraction")
+
+
+@lru_cache(maxsize=4096)
 def _latex_to_plain_text(latex: str) -> str:
-    """Generate a crude speech-friendly text alternative for ``latex``."""
-
-    text = latex.replace("\\frac", "fraction of")
-    text = text.replace("\\times", " times ")
-    text = text.replace("\\cdot", " multiplied by ")
-    text = text.replace("\\pm", " plus or minus ")
-    text = text.replace("\\leq", " less or equal ")
-    text = text.replace("\\geq", " greater or equal ")
-    text = re.sub(r"\\sqrt\s*\{([^{}]+)\}", r"square root of \1", text)
-    text = text.replace("^", " to the power of ")
-    text = text.replace("_", " sub ")
-    text = re.sub(r"\\[A-Za-z]+", lambda m: m.group(0)[1:], text)
-    text = text.replace("{", " ").replace("}", " ")
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    """Generate a speech-friendly text alternative for ``latex``.
+
+    The expression is tokenised once and read in a single pass: structural
+    commands wait on a stack for their arguments, so nested fractions, roots
+    and scripts are spoken in order, with end markers around compound
+    arguments. Structures left open by truncated input are still announced.
+    """
+
+    words: list[str] = []
+    # Frames are ``[kind, start, args, degree]``. ``kind`` is ``"{"`` for an
+    # open group, ``"["`` for a root degree, or a command awaiting arguments
+    # (the only frames whose ``args`` is a list).
+    stack: list[list] = []
+    tokens = _LATEX_TOKEN_PATTERN.findall(latex)
+    count = len(tokens)
+    i = 0
+    while i < count:
+        token = tokens[i]
+        i += 1
+        lead = token[0]
+        if lead not in _STRUCTURAL_LEADS:
+            if not stack or stack[-1][2] is None:
+                words.append(_SPOKEN_SYMBOLS.get(token, token))
+                continue
+            if len(token) > 1 and lead.isalnum():
+                # ``x^23`` and ``\frac12`` take single characters, as in TeX.
+                i -= 1
+                tokens[i] = token[1:]
+                token = lead
+            words.append(_SPOKEN_SYMBOLS.get(token, token))
+        elif lead == "\\":
+            name = token[1:]
+            if name in _STRUCTURAL_ARITY:
+                stack.append([name, len(words), [], None])
+                if name == "sqrt" and i < count and tokens[i] == "[":
+                    i += 1
+                    stack.append(["[", len(words), None, None])
+                continue
+            spoken = _SPOKEN_COMMANDS.get(name, name)
+            if not spoken:
+                continue
+            words.append(spoken)
+            if not stack or stack[-1][2] is None:
+                continue
+        elif lead == "{":
+            stack.append(["{", len(words), None, None])
+            continue
+        elif lead == "^" or lead == "_":
+            stack.append([lead, len(words), [], None])
+            continue
+        else:
+            opener = "{" if lead == "}" else "["
+            if not stack or stack[-1][0] != opener:
+                if lead == "]":
+                    words.append(token)
+                continue
+            start = stack.pop()[1]
+            if lead == "]":
+                # The root degree is held aside until the radicand arrives.
+                stack[-1][3] = words[start:]
+                del words[start:]
+                continue
+        # An atom just finished: hand it to any command waiting for arguments.
+        while stack:
+            frame = stack[-1]
+            args = frame[2]
+            if args is None:
+                break
+            args.append(len(words))
+            kind = frame[0]
+            if len(args) < _STRUCTURAL_ARITY.get(kind, 1):
+                break
+            stack.pop()
+            start = frame[1]
+            bounds = [start, *args]
+            spoken_args = [words[bounds[n]:bounds[n + 1]] for n in range(len(args))]
+            words[start:] = _speak_structure(kind, spoken_args, frame[3])
+    if stack:
+        _speak_open_frames(words, stack)
+    return " ".join(words)
 
 
 @dataclass
 class LatexMathMLConverter:
-    """Converts LaTeX expressions to MathML with semantic annotations."""
+    """Converts LaTeX expressions to MathML with semantic annotations.
+
+    Finished MathML is kept in a per-instance LRU cache of ``cache_size``
+    expressions, so a repeated expression skips both ``convert_func`` and
+    normalisation; the speech text cache only covers the annotation.
+    """
 
     convert_func: Optional[InlineConverter] = None
+    cache_size: int = 2048
+    _cache: "OrderedDict[Tuple[str, bool], str]" = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:  # pragma: no cover - exercised in production
         if self.convert_func is None:
@@ -59,6 +362,18 @@ class LatexMathMLConverter:
         if not cleaned:
             return ""
 
+        key = (cleaned, display)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        cached = self._convert_uncached(cleaned, display=display)
+        self._cache[key] = cached
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return cached
+
+    def _convert_uncached(self, cleaned: str, *, display: bool) -> str:
         mathml: str = ""
         if self.convert_func is not None:
             try:
@@ -77,6 +392,20 @@ class LatexMathMLConverter:
     def _normalise_mathml(self, mathml: str, latex: str, *, display: bool) -> str:
         """Ensure the generated MathML is navigable and annotated."""
 
+        match = _CONVERTER_OUTPUT_PATTERN.fullmatch(mathml)
+        if match is not None:
+            body = match.group("body")
+            if (
+                "<semantics" not in body
+                and "</math" not in body
+                and _is_well_formed_body(body)
+            ):
+                return _assemble_mathml(body, latex, display=display)
+        return self._normalise_mathml_tree(mathml, latex, display=display)
+
+    def _normalise_mathml_tree(self, mathml: str, latex: str, *, display: bool) -> str:
+        """Annotate arbitrary MathML by round-tripping it through ElementTree."""
+
         try:
             root = ET.fromstring(mathml)
         except ET.ParseError:
@@ -123,57 +452,146 @@ class LatexMathMLConverter:
     def _fallback_mathml(self, latex: str, *, display: bool) -> str:
         """Build a semantic ``mtext`` fallback that remains selectable."""
 
-        math = ET.Element(f"{{{MATHML_NS}}}math")
-        math.set("display", "block" if display else "inline")
-        math.set("data-latex", latex)
-        mrow = ET.SubElement(math, f"{{{MATHML_NS}}}mrow")
-        mtext = ET.SubElement(mrow, f"{{{MATHML_NS}}}mtext")
-        mtext.text = latex
-        semantics = ET.SubElement(math, f"{{{MATHML_NS}}}semantics")
-        annotation_tex = ET.SubElement(
-            semantics, f"{{{MATHML_NS}}}annotation", encoding="application/x-tex"
-        )
-        annotation_tex.text = latex
-        annotation_text = ET.SubElement(
-            semantics, f"{{{MATHML_NS}}}annotation", encoding="text/plain"
-        )
-        annotation_text.text = _latex_to_plain_text(latex)
-        return ET.tostring(math, encoding="unicode")
+        body = _FALLBACK_BODY_TEMPLATE.format(latex=_escape_text(latex))
+        return _assemble_mathml(body, latex, display=display)
 
     @staticmethod
     def _is_math_element(element: ET.Element) -> bool:
         return element.tag.endswith("math")
 
 
-def convert_latex_segments_to_mathml(text: str, converter: LatexMathMLConverter) -> str:
-    """Convert inline and display math markers inside ``text`` to MathML."""
+_MATH_REF_TEMPLATE = '<span class="math-ref" data-math-ref="{id}"></span>'
+_MATH_REF_PATTERN = re.compile(r'<span class="math-ref" data-math-ref="(?P<id>[^"]+)"></span>')
+_MATH_ENTRY_PATTERN = re.compile(r'<div data-math-id="(?P<id>[^"]+)">(?P<mathml>.*?)</div>', re.DOTALL)
+_MATH_ROOT_TAG_PATTERN = re.compile(r"\s*<[^>]*>")
+_MATH_ROOT_ATTRIBUTE_PATTERN = re.compile(r'\s(display|data-latex)="([^"]*)"')
+_MATH_ID_PATTERN = re.compile(r"m([0-9]+)")
+
+
+@dataclass
+class MathExpressionTable:
+    """Per-document table holding each unique MathML expression once.
+
+    Overlays rendered with a table carry lightweight ``math-ref`` placeholders
+    instead of full MathML; :func:`expand_math_references` restores the
+    inline form.
+    """
+
+    _ids: Dict[Tuple[str, bool], str] = field(default_factory=dict, init=False, repr=False)
+    _entries: Dict[str, str] = field(default_factory=dict, init=False, repr=False)
+    _next_id: int = field(default=1, init=False, repr=False)
+
+    def reference(self, latex: str, converter: LatexMathMLConverter, *, display: bool) -> str:
+        """Intern ``latex`` and return the placeholder markup that refers to it."""
+
+        cleaned = latex.strip()
+        if not cleaned:
+            return ""
+        key = (cleaned, display)
+        expression_id = self._ids.get(key)
+        if expression_id is None:
+            expression_id = f"m{self._next_id}"
+            self._next_id += 1
+            self._ids[key] = expression_id
+            self._entries[expression_id] = converter.convert(cleaned, display=display)
+        return _MATH_REF_TEMPLATE.format(id=expression_id)
+
+    def mathml(self, expression_id: str) -> str:
+        return self._entries[expression_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def to_html(self) -> str:
+        """Serialise the table as an inert ``<template>`` block for the reader."""
+
+        rendered = ["<template data-math-expressions>"]
+        for expression_id, mathml in self._entries.items():
+            rendered.append(f'  <div data-math-id="{expression_id}">{mathml}</div>')
+        rendered.append("</template>")
+        return "\n".join(rendered)
+
+    @classmethod
+    def from_html(cls, html: str) -> "MathExpressionTable":
+        """Rebuild a table from :meth:`to_html` output.
+
+        Each entry is re-keyed by the ``data-latex`` and ``display`` attributes
+        of its ``<math>`` root, so interning the same expression again reuses
+        its id, and new expressions are numbered past the highest stored id.
+        """
+
+        table = cls()
+        for match in _MATH_ENTRY_PATTERN.finditer(html):
+            expression_id, mathml = match.group("id"), match.group("mathml")
+            table._entries[expression_id] = mathml
+            numbered = _MATH_ID_PATTERN.fullmatch(expression_id)
+            if numbered is not None:
+                table._next_id = max(table._next_id, int(numbered.group(1)) + 1)
+            root = _MATH_ROOT_TAG_PATTERN.match(mathml)
+            attributes = dict(_MATH_ROOT_ATTRIBUTE_PATTERN.findall(root.group(0) if root else ""))
+            if "data-latex" in attributes:
+                key = (_unescape_attrib(attributes["data-latex"]), attributes.get("display") == "block")
+                table._ids.setdefault(key, expression_id)
+        return table
+
+
+def expand_math_references(html: str, table: MathExpressionTable) -> str:
+    """Replace ``math-ref`` placeholders in ``html`` with their MathML."""
+
+    return _MATH_REF_PATTERN.sub(lambda match: table.mathml(match.group("id")), html)
+
+
+def convert_latex_segments_to_mathml(
+    text: str,
+    converter: LatexMathMLConverter,
+    expressions: Optional[MathExpressionTable] = None,
+) -> str:
+    """Convert inline and display math markers inside ``text`` to MathML.
+
+    When ``expressions`` is given, each expression is interned in the table and
+    replaced by a reference instead of inline MathML.
+    """
 
     if not text:
         return ""
 
+    if expressions is None:
+        render = converter.convert
+    else:
+        def render(expr: str, *, display: bool) -> str:
+            return expressions.reference(expr, converter, display=display)
+
     def _replace_double(match: re.Match[str]) -> str:
         expr = match.group("expr") or ""
-        return converter.convert(expr, display=True)
+        return render(expr, display=True)
 
     converted = DOUBLE_DOLLAR_PATTERN.sub(_replace_double, text)
 
     def _replace_display(match: re.Match[str]) -> str:
         expr = match.group("bracket") or match.group("body") or ""
-        return converter.convert(expr, display=True)
+        return render(expr, display=True)
 
     converted = DISPLAY_PATTERN.sub(_replace_display, converted)
 
     def _replace_inline(match: re.Match[str]) -> str:
         expr = match.group("expr") or ""
-        return converter.convert(expr, display=False)
+        return render(expr, display=False)
 
     converted = INLINE_MATH_PATTERN.sub(_replace_inline, converted)
 
     return converted
 
 
-def pdf_page_to_html_overlay(page: "PDFPage", converter: LatexMathMLConverter) -> str:
-    """Render a :class:`PDFPage` into a MathML-friendly HTML overlay snippet."""
+def pdf_page_to_html_overlay(
+    page: "PDFPage",
+    converter: LatexMathMLConverter,
+    expressions: Optional[MathExpressionTable] = None,
+) -> str:
+    """Render a :class:`PDFPage` into a MathML-friendly HTML overlay snippet.
+
+    Pass a shared ``expressions`` table to emit references into it rather than
+    repeating the MathML for every occurrence.
+    """
 
     paragraphs = [seg.strip() for seg in re.split(r"\n{2,}", page.text) if seg.strip()]
     if not paragraphs:
@@ -183,22 +601,113 @@ def pdf_page_to_html_overlay(page: "PDFPage", converter: LatexMathMLConverter) -
         f'<section role="doc-page" data-page-index="{page.index}">' 
     ]
     for para in paragraphs:
-        converted = convert_latex_segments_to_mathml(para, converter)
+        converted = convert_latex_segments_to_mathml(para, converter, expressions)
         rendered.append(f"  <p>{converted}</p>")
     rendered.append("</section>")
     return "\n".join(rendered)
 
 
+# Per-process converter used by pool workers; see ``_init_overlay_worker``.
+_WORKER_CONVERTER: Optional[LatexMathMLConverter] = None
+
+
+def _init_overlay_worker(convert_func: Optional[InlineConverter], cache_size: int) -> None:
+    global _WORKER_CONVERTER
+    _WORKER_CONVERTER = LatexMathMLConverter(convert_func=convert_func, cache_size=cache_size)
+
+
+def _render_overlay_in_worker(page: "PDFPage") -> str:
+    assert _WORKER_CONVERTER is not None
+    return pdf_page_to_html_overlay(page, _WORKER_CONVERTER)
+
+
+def iter_pdf_pages_to_html_overlays(
+    pages: Iterable["PDFPage"],
+    converter: Optional[LatexMathMLConverter] = None,
+    *,
+    workers: int = 1,
+    prefetch: int = 4,
+    expressions: Optional[MathExpressionTable] = None,
+) -> Iterator[str]:
+    """Yield HTML overlays for ``pages`` in page order, skipping empty pages.
+
+    With ``workers > 1`` pages are rendered in a process pool. Each worker
+    builds its own converter (and cache) from ``converter.convert_func``, which
+    must therefore be picklable. At most ``workers * prefetch`` pages are in
+    flight at once, so memory stays bounded however long the document is.
+
+    A shared ``expressions`` table needs every page rendered in this process,
+    so it cannot be combined with ``workers > 1``.
+    """
+
+    converter = converter or LatexMathMLConverter()
+    if workers <= 1:
+        for page in pages:
+            html = pdf_page_to_html_overlay(page, converter, expressions)
+            if html:
+                yield html
+        return
+    if expressions is not None:
+        raise ValueError("An expression table cannot be shared across worker processes.")
+
+    window = max(1, workers * prefetch)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_overlay_worker,
+        initargs=(converter.convert_func, converter.cache_size),
+    )
+    pending: Deque[Future] = deque()
+    try:
+        for page in pages:
+            pending.append(executor.submit(_render_overlay_in_worker, page))
+            if len(pending) >= window:
+                html = pending.popleft().result()
+                if html:
+                    yield html
+        while pending:
+            html = pending.popleft().result()
+            if html:
+                yield html
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def convert_pdf_pages_to_html_overlays(
     pages: Iterable["PDFPage"],
     converter: Optional[LatexMathMLConverter] = None,
+    *,
+    workers: int = 1,
+    expressions: Optional[MathExpressionTable] = None,
 ) -> list[str]:
     """Convert pages to HTML overlays with MathML content."""
 
-    converter = converter or LatexMathMLConverter()
-    overlays: list[str] = []
-    for page in pages:
-        html = pdf_page_to_html_overlay(page, converter)
-        if html:
-            overlays.append(html)
-    return overlays
+    return list(
+        iter_pdf_pages_to_html_overlays(
+            pages, converter, workers=workers, expressions=expressions
+        )
+    )
+
+
+def write_html_overlays(
+    pages: Iterable["PDFPage"],
+    destination: Union[str, TextIO],
+    converter: Optional[LatexMathMLConverter] = None,
+    *,
+    workers: int = 1,
+) -> int:
+    """Stream overlays for ``pages`` to ``destination`` as they are rendered.
+
+    ``destination`` is a path or an open text file. Overlays are written in
+    page order, one after another, and the number written is returned.
+    """
+
+    if isinstance(destination, str):
+        with open(destination, "w", encoding="utf-8") as handle:
+            return write_html_overlays(pages, handle, converter, workers=workers)
+
+    written = 0
+    for html in iter_pdf_pages_to_html_overlays(pages, converter, workers=workers):
+        destination.write(html)
+        destination.write("\n")
+        written += 1
+    return written
@@ -0,0 +1,152 @@
+"""Indexed overlay bundles for random access to rendered pages.
+
+A bundle is a single file holding every page overlay produced by
+:func:`mathml_conversion.pdf_page_to_html_overlay`, followed by a fixed-width
+offset index keyed by ``data-page-index`` and a small footer::
+
+    [overlay HTML ...][index: (offset, length) per page slot][footer]
+
+Slot ``n`` of the index describes page ``first_page + n``; pages without an
+overlay have a zero length. Readers memory-map the file and slice any page out
+in constant time without copying it.
+"""
+from __future__ import annotations
+
+import mmap
+import re
+import struct
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from mathml_conversion import LatexMathMLConverter, iter_pdf_pages_to_html_overlays
+
+BUNDLE_MAGIC = b"EBOVLY01"
+
+_INDEX_ENTRY = struct.Struct("<QQ")
+# magic, first page index, slot count, byte offset of the index
+_FOOTER = struct.Struct("<8sqQQ")
+
+_PAGE_INDEX_PATTERN = re.compile(r'data-page-index="(-?\d+)"')
+
+
+def _page_index_of(html: str) -> int:
+    match = _PAGE_INDEX_PATTERN.search(html, 0, 256)
+    if match is None:
+        raise ValueError("Overlay is missing a data-page-index attribute.")
+    return int(match.group(1))
+
+
+def write_overlay_bundle(
+    pages: Iterable["PDFPage"],
+    path: str,
+    converter: Optional[LatexMathMLConverter] = None,
+    *,
+    workers: int = 1,
+) -> int:
+    """Render ``pages`` and write them to an overlay bundle at ``path``.
+
+    Overlays are streamed to disk as they are rendered; only the offsets are
+    kept in memory. Returns the number of pages written.
+    """
+
+    entries: List[Tuple[int, int, int]] = []
+    seen = set()
+    offset = 0
+    with open(path, "wb") as handle:
+        for html in iter_pdf_pages_to_html_overlays(pages, converter, workers=workers):
+            page_index = _page_index_of(html)
+            if page_index in seen:
+                raise ValueError(f"Duplicate overlay for page {page_index}.")
+            seen.add(page_index)
+            payload = html.encode("utf-8")
+            handle.write(payload)
+            entries.append((page_index, offset, len(payload)))
+            offset += len(payload)
+
+        first_page = min(seen) if seen else 0
+        slot_count = max(seen) - first_page + 1 if seen else 0
+        index = bytearray(_INDEX_ENTRY.size * slot_count)
+        for page_index, page_offset, length in entries:
+            _INDEX_ENTRY.pack_into(
+                index, (page_index - first_page) * _INDEX_ENTRY.size, page_offset, length
+            )
+        handle.write(index)
+        handle.write(_FOOTER.pack(BUNDLE_MAGIC, first_page, slot_count, offset))
+    return len(entries)
+
+
+class OverlayBundle:
+    """Memory-mapped, read-only view over an overlay bundle file.
+
+    Views returned by :meth:`page` point into the mapping; release them before
+    calling :meth:`close`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if len(self._mmap) < _FOOTER.size:
+            self.close()
+            raise ValueError(f"{path!r} is too small to be an overlay bundle.")
+        magic, first_page, slot_count, index_offset = _FOOTER.unpack_from(
+            self._mmap, len(self._mmap) - _FOOTER.size
+        )
+        expected_size = index_offset + slot_count * _INDEX_ENTRY.size + _FOOTER.size
+        if magic != BUNDLE_MAGIC or expected_size != len(self._mmap):
+            self.close()
+            raise ValueError(f"{path!r} is not a valid overlay bundle.")
+        self.first_page = first_page
+        self._slot_count = slot_count
+        self._index_offset = index_offset
+
+    def _entry(self, page_index: int) -> Tuple[int, int]:
+        slot = page_index - self.first_page
+        if 0 <= slot < self._slot_count:
+            offset, length = _INDEX_ENTRY.unpack_from(
+                self._mmap, self._index_offset + slot * _INDEX_ENTRY.size
+            )
+            if length:
+                return offset, length
+        raise KeyError(page_index)
+
+    def page(self, page_index: int) -> memoryview:
+        """Return the UTF-8 bytes of a page's ``<section>`` without copying."""
+
+        offset, length = self._entry(page_index)
+        return self._view[offset : offset + length]
+
+    def page_html(self, page_index: int) -> str:
+        """Return a page's overlay decoded as text."""
+
+        return str(self.page(page_index), "utf-8")
+
+    def page_indices(self) -> Iterator[int]:
+        for slot in range(self._slot_count):
+            _, length = _INDEX_ENTRY.unpack_from(
+                self._mmap, self._index_offset + slot * _INDEX_ENTRY.size
+            )
+            if length:
+                yield self.first_page + slot
+
+    def __contains__(self, page_index: object) -> bool:
+        if not isinstance(page_index, int):
+            return False
+        try:
+            self._entry(page_index)
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.page_indices())
+
+    def close(self) -> None:
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "OverlayBundle":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
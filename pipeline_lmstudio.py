@@ -148,12 +148,19 @@ def convert_page_text_to_mathml_html(
 
 
 def convert_document_to_mathml_overlays(
-    pages: Sequence[PDFPage], converter: Optional[LatexMathMLConverter] = None
+    pages: Sequence[PDFPage],
+    converter: Optional[LatexMathMLConverter] = None,
+    *,
+    workers: int = 1,
 ) -> List[str]:
-    """Convert pages to MathML-first HTML overlays for the web reader."""
+    """Convert pages to MathML-first HTML overlays for the web reader.
+
+    Pass ``workers > 1`` to render pages in a process pool; overlays still come
+    back in page order.
+    """
 
     converter = converter or LatexMathMLConverter()
-    return convert_pdf_pages_to_html_overlays(pages, converter)
+    return convert_pdf_pages_to_html_overlays(pages, converter, workers=workers)
 
 
 def convert_text_block_to_mathml(
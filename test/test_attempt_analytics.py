@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from attempt_analytics import AttemptArrays, forecast_review_load, forecast_tracker_load
+from attempt_storage import SQLiteAttemptStorage
+from attempt_tracking import AttemptTracker
+
+
+def _record_history(tracker, start):
+    tracker.record_attempt("q1", correct=False, timestamp=start)
+    tracker.record_attempt("q1", correct=False, timestamp=start + timedelta(minutes=1))
+    tracker.record_attempt("q1", correct=True, timestamp=start + timedelta(minutes=2))
+    tracker.record_attempt("q2", correct=True, timestamp=start)
+    tracker.record_attempt("q3", correct=False, timestamp=start)
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_attempt_arrays_compute_per_question_statistics(tmp_path, backend):
+    if backend == "json":
+        tracker = AttemptTracker(str(tmp_path / "log.json"), str(tmp_path / "queue.json"))
+    else:
+        tracker = AttemptTracker(storage=SQLiteAttemptStorage(str(tmp_path / "a.sqlite3")))
+    start = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    _record_history(tracker, start)
+
+    arrays = AttemptArrays.from_tracker(tracker)
+    order = [arrays.question_ids.index(qid) for qid in ("q1", "q2", "q3")]
+
+    assert len(arrays) == 5
+    assert arrays.timestamps.min() == start.timestamp()
+    assert arrays.attempt_counts()[order].tolist() == [3, 1, 1]
+    assert np.allclose(arrays.error_rates()[order], [2 / 3, 0.0, 1.0])
+    mastery = arrays.attempts_to_mastery()[order]
+    assert mastery[:2].tolist() == [3.0, 1.0]
+    assert np.isnan(mastery[2])
+    tracker.close()
+
+
+def test_forecast_buckets_due_reviews_by_hour(tmp_path):
+    start = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    origin = start.timestamp()
+    due = [origin - 600, origin + 10, origin + 3600 * 2 + 5, origin + 3600 * 30]
+
+    counts = forecast_review_load(due, start, hours=3)
+    assert counts.tolist() == [2, 0, 1]
+    assert forecast_review_load([], start, hours=2, bucket_minutes=30).tolist() == [0, 0, 0, 0]
+
+    tracker = AttemptTracker(
+        str(tmp_path / "log.json"), str(tmp_path / "queue.json"), base_interval_minutes=90
+    )
+    _record_history(tracker, start)
+    # q1 left the queue once answered correctly; q3 is due 90 minutes after its miss.
+    assert forecast_tracker_load(tracker, start, hours=3).tolist() == [0, 1, 0]
+
+
+def test_empty_tracker_produces_empty_columns(tmp_path):
+    tracker = AttemptTracker(str(tmp_path / "log.json"), str(tmp_path / "queue.json"))
+    arrays = AttemptArrays.from_tracker(tracker)
+    assert len(arrays) == 0
+    assert arrays.attempts_to_mastery().size == 0
@@ -0,0 +1,154 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from attempt_sharding import ShardedAttemptTracker
+from attempt_storage import SQLiteAttemptStorage
+
+
+START = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def test_learners_are_isolated_and_persisted_per_shard(tmp_path):
+    root = str(tmp_path / "shards")
+    with ShardedAttemptTracker(root, shard_count=4, base_interval_minutes=10) as tracker:
+        tracker.record_attempt("alice", "q1", correct=False, timestamp=START)
+        tracker.record_attempt("bob", "q1", correct=True, timestamp=START)
+
+        assert tracker.get_next_review("alice", "q1") == (START + timedelta(minutes=10)).isoformat()
+        assert tracker.get_next_review("bob", "q1") is None
+        assert len(tracker.get_attempts("alice", "q1")) == 1
+        shard = tracker.shard_for("alice")
+
+    assert os.path.exists(os.path.join(root, f"shard-{shard:03d}", "attempt_log.json"))
+    with ShardedAttemptTracker(root, shard_count=4) as reopened:
+        assert reopened.get_attempts("alice", "q1")[0]["correct"] is False
+        assert reopened.get_items_for_export(START + timedelta(minutes=10)) == [("alice", "q1")]
+
+    with pytest.raises(ValueError):
+        ShardedAttemptTracker(root, shard_count=8)
+
+
+def test_idle_shards_are_evicted_least_recently_used_first(tmp_path):
+    tracker = ShardedAttemptTracker(str(tmp_path), shard_count=16, max_open_shards=2)
+    learners = {}
+    for index in range(100):
+        learner = f"learner-{index}"
+        learners.setdefault(tracker.shard_for(learner), learner)
+        if len(learners) == 3:
+            break
+    first, second, third = learners.values()
+
+    tracker.record_attempt(first, "q1", correct=False, timestamp=START)
+    tracker.record_attempt(second, "q1", correct=False, timestamp=START)
+    tracker.get_attempts(first, "q1")
+    tracker.record_attempt(third, "q1", correct=False, timestamp=START)
+
+    assert tracker.open_shards == [tracker.shard_for(first), tracker.shard_for(third)]
+    # The evicted shard was flushed on close and reloads transparently.
+    assert len(tracker.get_attempts(second, "q1")) == 1
+    tracker.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_export_merges_due_items_across_shards(tmp_path, backend):
+    options = {}
+    if backend == "sqlite":
+        options["storage_factory"] = lambda path: SQLiteAttemptStorage(
+            os.path.join(path, "attempts.sqlite3")
+        )
+    tracker = ShardedAttemptTracker(
+        str(tmp_path), shard_count=8, max_open_shards=2, base_interval_minutes=10, **options
+    )
+    expected = []
+    for index in range(12):
+        learner = f"learner-{index:02d}"
+        moment = START + timedelta(minutes=index)
+        tracker.record_attempt(learner, "q2", correct=False, timestamp=moment)
+        tracker.record_attempt(learner, "q1", correct=False, timestamp=moment)
+        expected += [(learner, "q1"), (learner, "q2")]
+
+    late = START + timedelta(hours=1)
+    assert tracker.get_items_for_export(late) == expected
+    assert tracker.get_items_for_export(START + timedelta(minutes=10)) == expected[:2]
+    # The earliest-due learners win; ties break on the composite id.
+    assert tracker.get_items_for_export(late, limit=3) == expected[:3]
+
+    tracker.mark_exported(expected[:4])
+    assert tracker.get_items_for_export(late) == expected[4:]
+    tracker.close()
+
+
+def test_export_only_opens_shards_with_due_items(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    learners = [f"learner-{index:02d}" for index in range(32)]
+    with ShardedAttemptTracker(root, shard_count=16, max_open_shards=4) as tracker:
+        for index, learner in enumerate(learners):
+            moment = START + timedelta(days=index)
+            tracker.record_attempt(learner, "q1", correct=False, timestamp=moment)
+
+    tracker = ShardedAttemptTracker(root, shard_count=16, max_open_shards=4)
+    opened = []
+    original_open = tracker._open_shard
+
+    def counting_open(shard):
+        opened.append(shard)
+        return original_open(shard)
+
+    monkeypatch.setattr(tracker, "_open_shard", counting_open)
+    due_shards = {tracker.shard_for(learners[0]), tracker.shard_for(learners[1])}
+
+    check = START + timedelta(days=1, minutes=15)
+    expected = [(learners[0], "q1"), (learners[1], "q1")]
+    assert tracker.get_items_for_export(check) == expected
+    # Naive times are read as UTC, like the tracker does.
+    assert tracker.get_items_for_export(check.replace(tzinfo=None), limit=1) == expected[:1]
+    assert set(opened) == due_shards
+
+    # A shard without an index, as after a crash, is opened to be safe.
+    idle = next(shard for shard in range(16) if shard not in due_shards)
+    os.remove(os.path.join(root, f"shard-{idle:03d}", "due_at.txt"))
+    assert tracker.get_items_for_export(check) == expected
+    assert idle in opened
+    tracker.close()
+
+
+def test_shared_shards_are_not_skipped_by_the_due_index(tmp_path):
+    root = str(tmp_path)
+    options = dict(shard_count=4, max_open_shards=1, process_safe=True)
+    tracker = ShardedAttemptTracker(root, **options)
+    # Stands in for another process that keeps alice's shard open.
+    other = ShardedAttemptTracker(root, **options)
+    assert tracker.shard_for("alice") != tracker.shard_for("bob")
+
+    other.get_attempts("alice", "q1")
+    tracker.record_attempt("alice", "q1", correct=True, timestamp=START)
+    tracker.record_attempt("bob", "q1", correct=True, timestamp=START)
+    # alice's shard is closed here with nothing queued; then the other
+    # process queues a review in it.
+    other.record_attempt("alice", "q2", correct=False, timestamp=START)
+
+    assert tracker.get_items_for_export(START + timedelta(days=1)) == [("alice", "q2")]
+    other.close()
+    tracker.close()
+
+
+def test_batch_ingestion_targets_one_learner(tmp_path):
+    with ShardedAttemptTracker(str(tmp_path), shard_count=2) as tracker:
+        count = tracker.record_attempts(
+            "carol",
+            [
+                {"question_id": "q1", "correct": False, "timestamp": START.isoformat()},
+                {
+                    "question_id": "q1",
+                    "correct": True,
+                    "timestamp": (START + timedelta(minutes=1)).isoformat(),
+                },
+            ],
+        )
+        assert count == 2
+        attempts = tracker.get_attempts("carol", "q1")
+        assert [attempt["correct"] for attempt in attempts] == [False, True]
+        with pytest.raises(ValueError):
+            tracker.record_attempt("bad\x1fid", "q1", correct=True)
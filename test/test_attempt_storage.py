@@ -0,0 +1,175 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from attempt_storage import JsonAttemptStorage, SQLiteAttemptStorage
+from attempt_tracking import AttemptTracker
+
+
+def test_sqlite_backend_schedules_and_exports(tmp_path):
+    storage = SQLiteAttemptStorage(str(tmp_path / "attempts.sqlite3"))
+    tracker = AttemptTracker(base_interval_minutes=5, storage=storage)
+
+    start = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    tracker.record_attempt("q42", correct=False, timestamp=start, metadata={"source": "quiz"})
+    tracker.record_attempt("q42", correct=False, timestamp=start + timedelta(minutes=5))
+    tracker.record_attempt("q7", correct=True, timestamp=start)
+
+    second_revisit = start + timedelta(minutes=5) + timedelta(minutes=10)
+    assert tracker.get_next_review("q42") == second_revisit.isoformat()
+    assert tracker.get_next_review("q7") is None
+    assert tracker.get_attempts("q42")[0] == {
+        "timestamp": start.isoformat(),
+        "correct": False,
+        "metadata": {"source": "quiz"},
+    }
+    assert tracker.get_items_for_export(second_revisit - timedelta(minutes=1)) == []
+    assert tracker.get_items_for_export(second_revisit) == ["q42"]
+
+    tracker.mark_exported(["q42"])
+    assert tracker.get_items_for_export(second_revisit) == []
+    tracker.close()
+
+    reopened = AttemptTracker(storage=SQLiteAttemptStorage(str(tmp_path / "attempts.sqlite3")))
+    assert len(reopened.get_attempts("q42")) == 2
+    assert reopened.get_next_review("q42") == second_revisit.isoformat()
+    reopened.close()
+
+
+def test_sqlite_backend_imports_json_files(tmp_path):
+    log_path = tmp_path / "attempts.json"
+    queue_path = tmp_path / "queue.json"
+    json_tracker = AttemptTracker(str(log_path), str(queue_path), base_interval_minutes=10)
+    now = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    json_tracker.record_attempt("q1", correct=False, timestamp=now)
+    json_tracker.record_attempt("q2", correct=True, timestamp=now)
+
+    storage = SQLiteAttemptStorage(str(tmp_path / "attempts.sqlite3"))
+    assert storage.import_json(str(log_path), str(queue_path)) == 2
+    tracker = AttemptTracker(base_interval_minutes=10, storage=storage)
+
+    assert tracker.get_attempts("q1") == json_tracker.get_attempts("q1")
+    assert tracker.get_next_review("q1") == json_tracker.get_next_review("q1")
+    due = now + timedelta(minutes=10)
+    assert tracker.get_items_for_export(due) == ["q1"]
+
+    tracker.record_attempt("q1", correct=False, timestamp=due)
+    assert tracker.get_next_review("q1") == (due + timedelta(minutes=20)).isoformat()
+    tracker.close()
+
+
+def test_sqlite_backend_imports_journaled_attempts(tmp_path):
+    log_path = str(tmp_path / "attempts.json")
+    queue_path = str(tmp_path / "queue.json")
+    journal_path = str(tmp_path / "attempts.journal")
+    json_tracker = AttemptTracker(
+        log_path, queue_path, base_interval_minutes=10, journal_path=journal_path
+    )
+    now = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    json_tracker.record_attempt("q1", correct=False, timestamp=now)
+    json_tracker.record_attempt("q1", correct=False, timestamp=now + timedelta(minutes=10))
+    json_tracker.record_attempt("q2", correct=True, timestamp=now)
+    json_tracker.mark_exported(["q1"])
+
+    storage = SQLiteAttemptStorage(str(tmp_path / "attempts.sqlite3"))
+    assert storage.import_json(log_path, queue_path, journal_path) == 3
+    tracker = AttemptTracker(base_interval_minutes=10, storage=storage)
+
+    assert tracker.get_attempts("q1") == json_tracker.get_attempts("q1")
+    assert tracker.get_next_review("q1") == json_tracker.get_next_review("q1")
+    assert tracker.get_items_for_export(now + timedelta(days=1)) == []
+    tracker.close()
+    json_tracker.close()
+
+
+def test_sqlite_backend_limits_to_earliest_due(tmp_path):
+    tracker = AttemptTracker(
+        base_interval_minutes=10, storage=SQLiteAttemptStorage(str(tmp_path / "a.sqlite3"))
+    )
+    start = datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc)
+    for offset, question_id in enumerate(["q3", "q1", "q2"]):
+        tracker.record_attempt(question_id, correct=False, timestamp=start + timedelta(minutes=offset))
+
+    later = start + timedelta(hours=1)
+    assert tracker.get_items_for_export(later, limit=2) == ["q1", "q3"]
+    assert tracker.get_items_for_export(later) == ["q1", "q2", "q3"]
+    tracker.close()
+
+
+def test_json_storage_round_trips_compact_records(tmp_path):
+    log_path = tmp_path / "attempts.json"
+    legacy_attempts = [
+        {"timestamp": "2024-01-01T08:00:00+00:00", "correct": False},
+        {"timestamp": "2024-01-01T09:00:00.250000+00:00", "correct": True, "metadata": {"a": "1"}},
+        # Not representable exactly as UTC microseconds; kept verbatim.
+        {"timestamp": "2024-01-01T10:00:00+02:00", "correct": False, "source": "import"},
+    ]
+    log_path.write_text(
+        json.dumps({"q1": {"attempts": legacy_attempts, "next_review": None}}), encoding="utf-8"
+    )
+
+    storage = JsonAttemptStorage(str(log_path), str(tmp_path / "queue.json"))
+    assert storage.get_attempts("q1") == legacy_attempts
+    assert storage.count_incorrect("q1") == 2
+
+    storage.append_attempt(
+        "q1", {"timestamp": "2024-01-02T08:00:00+00:00", "correct": False}, "2024-01-02T09:00:00+00:00"
+    )
+    assert storage.count_incorrect("q1") == 3
+    storage.commit()
+
+    saved = json.loads(log_path.read_text(encoding="utf-8"))
+    assert saved["q1"]["attempts"][:3] == legacy_attempts
+    assert saved["q1"]["next_review"] == "2024-01-02T09:00:00+00:00"
+
+
+def test_json_storage_retries_failed_journal_writes(tmp_path, monkeypatch):
+    import attempt_storage
+
+    journal_path = tmp_path / "attempts.journal"
+    storage = JsonAttemptStorage(
+        str(tmp_path / "attempts.json"), str(tmp_path / "queue.json"), str(journal_path)
+    )
+    original_append = attempt_storage._append_journal
+
+    def failing_append(path, events):
+        raise OSError("disk full")
+
+    storage.append_attempt("q1", {"timestamp": "2024-01-01T08:00:00+00:00", "correct": True}, None)
+    storage.prepare_commit()
+    storage.append_attempt("q2", {"timestamp": "2024-01-01T08:00:00+00:00", "correct": True}, None)
+    monkeypatch.setattr(attempt_storage, "_append_journal", failing_append)
+    with pytest.raises(OSError):
+        storage.commit()
+    monkeypatch.setattr(attempt_storage, "_append_journal", original_append)
+    storage.commit()
+
+    events = [json.loads(line) for line in journal_path.read_text(encoding="utf-8").splitlines()]
+    assert [event["question_id"] for event in events] == ["q1", "q2"]
+
+
+def test_json_storage_keeps_one_snapshot_while_writes_fail(tmp_path, monkeypatch):
+    import attempt_storage
+
+    log_path = tmp_path / "attempts.json"
+    storage = JsonAttemptStorage(str(log_path), str(tmp_path / "queue.json"))
+    original_save = attempt_storage._save_json
+
+    def failing_save(path, payload):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(attempt_storage, "_save_json", failing_save)
+    for index in range(40):
+        storage.append_attempt(
+            f"q{index}", {"timestamp": "2024-01-01T08:00:00+00:00", "correct": True}, None
+        )
+        with pytest.raises(OSError):
+            storage.commit()
+    # Each newer snapshot replaced the failed one instead of queueing behind it.
+    assert len(storage._unwritten) == 1
+
+    monkeypatch.setattr(attempt_storage, "_save_json", original_save)
+    storage.commit()
+    assert len(json.loads(log_path.read_text(encoding="utf-8"))) == 40
+    assert not storage._unwritten
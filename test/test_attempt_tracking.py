@@ -1,6 +1,11 @@
+import multiprocessing
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 
-from attempt_tracking import AttemptTracker
+import pytest
+
+from attempt_tracking import AttemptOutcome, AttemptTracker, read_attempts_jsonl
 
 
 def test_incorrect_attempt_schedules_revisit(tmp_path):
@@ -44,3 +49,320 @@ def test_repeated_incorrect_attempts_expand_interval(tmp_path):
 
     ready_after_time = tracker.get_items_for_export(second_revisit)
     assert ready_after_time == ["q42"]
+
+
+def test_journal_mode_replays_events_on_startup(tmp_path):
+    log_path = tmp_path / "attempts.json"
+    queue_path = tmp_path / "queue.json"
+    journal_path = tmp_path / "attempts.journal"
+    tracker = AttemptTracker(
+        str(log_path), str(queue_path), base_interval_minutes=10, journal_path=str(journal_path)
+    )
+
+    now = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    tracker.record_attempt("q1", correct=False, timestamp=now)
+    tracker.record_attempt("q2", correct=False, timestamp=now)
+    tracker.record_attempt("q2", correct=True, timestamp=now + timedelta(minutes=1))
+    tracker.mark_exported(["q1"])
+
+    assert not log_path.exists()
+    # A write torn by a crash must not prevent recovery.
+    with open(journal_path, "a", encoding="utf-8") as handle:
+        handle.write('{"op": "attempt", "quest')
+
+    restored = AttemptTracker(
+        str(log_path), str(queue_path), base_interval_minutes=10, journal_path=str(journal_path)
+    )
+    assert len(restored.get_attempts("q2")) == 2
+    assert restored.get_next_review("q1") == (now + timedelta(minutes=10)).isoformat()
+    assert restored.get_items_for_export(now + timedelta(days=1)) == []
+
+
+def test_journal_compaction_is_idempotent(tmp_path):
+    log_path = tmp_path / "attempts.json"
+    queue_path = tmp_path / "queue.json"
+    journal_path = tmp_path / "attempts.journal"
+    tracker = AttemptTracker(
+        str(log_path), str(queue_path), journal_path=str(journal_path), compact_every=3
+    )
+
+    now = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    for minute in range(4):
+        tracker.record_attempt("q1", correct=False, timestamp=now + timedelta(minutes=minute))
+
+    assert log_path.exists()
+    assert len(journal_path.read_text(encoding="utf-8").splitlines()) == 1
+
+    # Simulate a crash after the snapshot was written but before truncation.
+    journal_before = journal_path.read_text(encoding="utf-8")
+    tracker.compact()
+    journal_path.write_text(journal_before, encoding="utf-8")
+
+    restored = AttemptTracker(
+        str(log_path), str(queue_path), journal_path=str(journal_path), compact_every=3
+    )
+    assert restored.get_attempts("q1") == tracker.get_attempts("q1")
+    assert len(restored.get_attempts("q1")) == 4
+
+
+def test_export_pages_through_due_items_by_due_time(tmp_path):
+    log_path = tmp_path / "attempts.json"
+    queue_path = tmp_path / "queue.json"
+    tracker = AttemptTracker(str(log_path), str(queue_path), base_interval_minutes=10)
+
+    start = datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc)
+    for offset, question_id in enumerate(["q5", "q3", "q4", "q1", "q2"]):
+        tracker.record_attempt(question_id, correct=False, timestamp=start + timedelta(minutes=offset))
+    # Rescheduling q5 moves it behind everything else; answering q4 dequeues it.
+    tracker.record_attempt("q5", correct=False, timestamp=start + timedelta(minutes=30))
+    tracker.record_attempt("q4", correct=True, timestamp=start + timedelta(minutes=30))
+
+    later = start + timedelta(hours=2)
+    assert tracker.get_items_for_export(later) == ["q1", "q2", "q3", "q5"]
+
+    first_page = tracker.get_items_for_export(later, limit=2)
+    assert first_page == ["q1", "q3"]
+    tracker.mark_exported(first_page)
+    assert tracker.get_items_for_export(later, limit=2) == ["q2", "q5"]
+
+    reloaded = AttemptTracker(str(log_path), str(queue_path), base_interval_minutes=10)
+    assert reloaded.get_items_for_export(later) == ["q2", "q5"]
+    assert reloaded.get_items_for_export(start + timedelta(minutes=13)) == []
+
+
+def test_record_attempts_applies_batch_in_timestamp_order(tmp_path, monkeypatch):
+    log_path = tmp_path / "attempts.json"
+    queue_path = tmp_path / "queue.json"
+    tracker = AttemptTracker(str(log_path), str(queue_path), base_interval_minutes=5)
+
+    persisted = []
+    original_persist = tracker._persist
+    monkeypatch.setattr(tracker, "_persist", lambda: persisted.append(original_persist()))
+
+    start = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    jsonl_path = tmp_path / "attempts.jsonl"
+    jsonl_path.write_text(
+        "\n".join(
+            [
+                f'{{"question_id": "q1", "correct": false, "timestamp": "{(start + timedelta(minutes=20)).isoformat()}"}}',
+                "",
+                f'{{"question_id": "q2", "correct": true, "timestamp": "{start.isoformat()}", "metadata": {{"device": "tablet"}}}}',
+            ]
+        ),
+        encoding="utf-8",
+    )
+    batch = [
+        AttemptOutcome("q1", correct=False, timestamp=start + timedelta(minutes=10)),
+        {"question_id": "q1", "correct": False, "timestamp": start.isoformat()},
+        *read_attempts_jsonl(str(jsonl_path)),
+    ]
+
+    assert tracker.record_attempts(batch) == 4
+    assert len(persisted) == 1
+
+    timestamps = [attempt["timestamp"] for attempt in tracker.get_attempts("q1")]
+    assert timestamps == sorted(timestamps)
+    # Third consecutive miss backs off to 5 * 2 ** 2 minutes.
+    third_miss = start + timedelta(minutes=20)
+    assert tracker.get_next_review("q1") == (third_miss + timedelta(minutes=20)).isoformat()
+    assert tracker.get_attempts("q2")[0]["metadata"] == {"device": "tablet"}
+
+    reloaded = AttemptTracker(str(log_path), str(queue_path), base_interval_minutes=5)
+    assert len(reloaded.get_attempts("q1")) == 3
+
+
+def test_failed_batch_leaves_nothing_behind(tmp_path):
+    log_path = tmp_path / "attempts.json"
+    queue_path = tmp_path / "queue.json"
+    tracker = AttemptTracker(str(log_path), str(queue_path), base_interval_minutes=5)
+    start = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    batch = [
+        AttemptOutcome("q1", correct=False, timestamp=start),
+        # Scheduling this miss overflows the datetime range.
+        AttemptOutcome("q2", correct=False, timestamp=datetime.max.replace(tzinfo=timezone.utc)),
+    ]
+
+    with pytest.raises(OverflowError):
+        tracker.record_attempts(batch)
+    assert tracker.get_attempts("q1") == []
+
+    tracker.record_attempt("q3", correct=True, timestamp=start)
+    reloaded = AttemptTracker(str(log_path), str(queue_path), base_interval_minutes=5)
+    assert reloaded.get_attempts("q1") == []
+    assert reloaded.get_next_review("q1") is None
+    assert len(reloaded.get_attempts("q3")) == 1
+
+
+def _record_from_worker(log_path, queue_path, journal_path, worker, count):
+    tracker = AttemptTracker(
+        log_path, queue_path, journal_path=journal_path, compact_every=7, process_safe=True
+    )
+    start = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    for index in range(count):
+        tracker.record_attempt(
+            f"q{index % 3}", correct=False, timestamp=start + timedelta(seconds=index),
+            metadata={"worker": str(worker)},
+        )
+    tracker.close()
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_process_safe_trackers_do_not_lose_attempts(tmp_path, journal):
+    log_path = str(tmp_path / "attempts.json")
+    queue_path = str(tmp_path / "queue.json")
+    journal_path = str(tmp_path / "attempts.journal") if journal else None
+
+    observer = AttemptTracker(log_path, queue_path, journal_path=journal_path, process_safe=True)
+    # The default start method: the worker target is module-level, so it also
+    # runs under "spawn", the only method on Windows.
+    workers = [
+        multiprocessing.Process(
+            target=_record_from_worker, args=(log_path, queue_path, journal_path, worker, 15)
+        )
+        for worker in range(4)
+    ]
+    for process in workers:
+        process.start()
+    # Threads in this process share one tracker alongside the other processes.
+    threads = [
+        threading.Thread(
+            target=observer.record_attempt, args=(f"t{index}", False),
+        )
+        for index in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+    total = sum(len(observer.get_attempts(f"q{index}")) for index in range(3))
+    assert total == 60
+    assert all(len(observer.get_attempts(f"t{index}")) == 1 for index in range(8))
+
+    reloaded = AttemptTracker(log_path, queue_path, journal_path=journal_path)
+    assert sum(len(reloaded.get_attempts(f"q{index}")) for index in range(3)) == 60
+    # Every miss counted, whichever process recorded it: 20 misses per question.
+    assert reloaded.get_next_review("q0") is not None
+
+
+def test_write_behind_defers_and_flushes_changes(tmp_path):
+    log_path = tmp_path / "attempts.json"
+    queue_path = tmp_path / "queue.json"
+    now = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+    with AttemptTracker(
+        str(log_path), str(queue_path), flush_interval_ms=60_000, flush_after_changes=1_000
+    ) as tracker:
+        tracker.record_attempt("q1", correct=False, timestamp=now)
+        assert tracker.get_next_review("q1") is not None
+        assert not log_path.exists()
+        tracker.flush()
+        assert log_path.exists()
+        tracker.record_attempt("q2", correct=False, timestamp=now)
+    # Leaving the block flushed the change made after the explicit flush.
+    assert len(AttemptTracker(str(log_path), str(queue_path)).get_attempts("q2")) == 1
+
+
+def test_write_behind_flushes_in_background(tmp_path):
+    log_path = tmp_path / "attempts.json"
+    queue_path = tmp_path / "queue.json"
+    tracker = AttemptTracker(
+        str(log_path), str(queue_path), flush_interval_ms=10, flush_after_changes=1_000
+    )
+    tracker.record_attempt("q1", correct=False)
+    deadline = time.monotonic() + 5
+    while not log_path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert log_path.exists()
+    tracker.close()
+    tracker.close()
+
+    with pytest.raises(ValueError):
+        AttemptTracker(str(log_path), str(queue_path), flush_interval_ms=10, process_safe=True)
+
+
+def test_write_behind_records_while_a_flush_is_writing(tmp_path, monkeypatch):
+    import attempt_storage
+
+    journal_path = tmp_path / "attempts.journal"
+    writing = threading.Event()
+    release = threading.Event()
+    original_append = attempt_storage._append_journal
+
+    def slow_append(path, events):
+        writing.set()
+        assert release.wait(5)
+        return original_append(path, events)
+
+    monkeypatch.setattr(attempt_storage, "_append_journal", slow_append)
+    tracker = AttemptTracker(
+        str(tmp_path / "attempts.json"),
+        str(tmp_path / "queue.json"),
+        journal_path=str(journal_path),
+        flush_interval_ms=1,
+    )
+    now = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    tracker.record_attempt("q1", correct=False, timestamp=now)
+    assert writing.wait(5)
+
+    # The flush thread is blocked inside the write without holding the lock.
+    recorder = threading.Thread(
+        target=tracker.record_attempt, args=("q2", False), kwargs={"timestamp": now}
+    )
+    recorder.start()
+    recorder.join(2)
+    assert not recorder.is_alive()
+    assert tracker.get_items_for_export(now + timedelta(hours=1)) == ["q1", "q2"]
+    release.set()
+    tracker.close()
+
+    reloaded = AttemptTracker(
+        str(tmp_path / "attempts.json"), str(tmp_path / "queue.json"), journal_path=str(journal_path)
+    )
+    assert len(reloaded.get_attempts("q1")) == 1
+    assert len(reloaded.get_attempts("q2")) == 1
+
+
+def test_closed_tracker_rejects_changes(tmp_path):
+    tracker = AttemptTracker(
+        str(tmp_path / "attempts.json"), str(tmp_path / "queue.json"), flush_interval_ms=10
+    )
+    tracker.record_attempt("q1", correct=False)
+    tracker.close()
+
+    with pytest.raises(RuntimeError):
+        tracker.record_attempt("q2", correct=False)
+    with pytest.raises(RuntimeError):
+        tracker.record_attempts([AttemptOutcome("q2", correct=True, timestamp=None)])
+    with pytest.raises(RuntimeError):
+        tracker.mark_exported(["q1"])
+    assert AttemptTracker(
+        str(tmp_path / "attempts.json"), str(tmp_path / "queue.json")
+    ).get_attempts("q2") == []
+
+
+def test_flush_thread_survives_a_failed_prepare(tmp_path, monkeypatch):
+    log_path = tmp_path / "attempts.json"
+    tracker = AttemptTracker(str(log_path), str(tmp_path / "queue.json"), flush_interval_ms=5)
+    original_prepare = tracker._storage.prepare_commit
+    failures = []
+
+    def failing_once():
+        if not failures:
+            failures.append(True)
+            raise MemoryError("transient")
+        original_prepare()
+
+    monkeypatch.setattr(tracker._storage, "prepare_commit", failing_once)
+    tracker.record_attempt("q1", correct=False)
+    deadline = time.monotonic() + 5
+    while not log_path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert failures
+    assert tracker._flush_thread.is_alive()
+    assert log_path.exists()
+    tracker.close()
@@ -1,11 +1,17 @@
 import re
+import xml.etree.ElementTree as ET
 
 import pytest
 
 from mathml_conversion import (
     MATHML_NS,
     LatexMathMLConverter,
+    MathExpressionTable,
+    _latex_to_plain_text,
     convert_latex_segments_to_mathml,
+    convert_pdf_pages_to_html_overlays,
+    expand_math_references,
+    write_html_overlays,
 )
 from pipeline_lmstudio import (
     PDFPage,
@@ -43,6 +49,20 @@ def test_converter_falls_back_to_mtext_when_library_missing() -> None:
     assert '<mtext>x+1</mtext>' in mathml
 
 
+def test_converter_cache_evicts_least_recently_used() -> None:
+    calls: list[str] = []
+
+    def _convert(latex: str) -> str:
+        calls.append(latex)
+        return f'<math xmlns="{MATHML_NS}"><mi>{latex}</mi></math>'
+
+    converter = LatexMathMLConverter(convert_func=_convert, cache_size=2)
+    for latex in ("a", "b", "a", "c", "a", "b"):
+        converter.convert(latex)
+    # "c" evicts "b" only; "a" stays cached because it was used more recently.
+    assert calls == ["a", "b", "c", "b"]
+
+
 def test_inline_and_display_segments_are_converted(stub_converter: LatexMathMLConverter) -> None:
     text = "The relation $E=mc^2$ is equivalent to $$E^2 = (mc^2)^2$$."
     converted = convert_latex_segments_to_mathml(text, stub_converter)
@@ -71,3 +91,136 @@ def test_document_conversion_filters_empty_pages(stub_converter: LatexMathMLConv
 def test_text_block_helper_uses_converter(stub_converter: LatexMathMLConverter) -> None:
     result = convert_text_block_to_mathml("$x+y$", converter=stub_converter)
     assert '<math' in result
+
+
+def test_fast_path_matches_tree_normalisation(stub_converter: LatexMathMLConverter) -> None:
+    latex = 'a<b & "c"'
+    raw = f'<math xmlns="{MATHML_NS}" display="inline"><mrow><mi>x</mi></mrow></math>'
+    fast = stub_converter._normalise_mathml(raw, latex, display=True)
+    tree = stub_converter._normalise_mathml_tree(raw, latex, display=True)
+    assert fast == tree
+    assert 'data-latex="a&lt;b &amp; &quot;c&quot;"' in fast
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "<mi>x</mi><mi>y",
+        "<mi>x</mo>",
+        "<mi>a < b</mi>",
+        "<mi>&nbsp;</mi>",
+        "<!-- note --><mi>x</mi>",
+        "<mi>x</mi/>",
+        '<mi a="1" a="2">x</mi>',
+    ],
+)
+def test_malformed_mathml_never_takes_the_fast_path(body: str) -> None:
+    raw = f'<math xmlns="{MATHML_NS}">{body}</math>'
+    converter = LatexMathMLConverter(convert_func=lambda latex: raw)
+    mathml = converter.convert("x", display=False)
+    assert mathml == converter._normalise_mathml_tree(raw, "x", display=False)
+    ET.fromstring(mathml)
+
+
+def test_unexpected_mathml_uses_tree_path() -> None:
+    def _convert(latex: str) -> str:
+        return f'<mrow xmlns="{MATHML_NS}"><mi>{latex}</mi></mrow>'
+
+    converter = LatexMathMLConverter(convert_func=_convert)
+    mathml = converter.convert("x", display=False)
+    assert mathml.startswith("<math")
+    assert "<mrow><mi>x</mi></mrow>" in mathml
+    assert 'annotation encoding="application/x-tex">x' in mathml
+
+
+@pytest.mark.parametrize(
+    ("latex", "expected"),
+    [
+        ("E=mc^2", "E equals mc to the power of 2"),
+        (r"\frac{a}{b}", "a over b"),
+        (r"\frac{\sqrt{x+1}}{2}", "fraction square root of x plus 1 end root over 2 end fraction"),
+        (r"\sqrt[3]{\sqrt{x}}", "cube root of square root of x end root"),
+        (r"x^{2n} \leq y_1", "x to the power of 2 n end power less or equal y sub 1"),
+        (r"\frac12", "1 over 2"),
+    ],
+)
+def test_plain_text_reads_nested_structures(latex: str, expected: str) -> None:
+    assert _latex_to_plain_text(latex) == expected
+
+
+@pytest.mark.parametrize(
+    ("latex", "expected"),
+    [
+        (r"\frac{a}", "fraction a"),
+        (r"\frac{a}{b", "fraction a over b"),
+        (r"\sqrt", "square root"),
+        (r"\sqrt[3]{x", "cube root of x"),
+        (r"\sqrt[{]}", "root ]"),
+        ("x^", "x to the power of"),
+    ],
+)
+def test_plain_text_announces_truncated_structures(latex: str, expected: str) -> None:
+    assert _latex_to_plain_text(latex) == expected
+
+
+def _picklable_convert(latex: str) -> str:
+    return f'<math xmlns="{MATHML_NS}"><mi>{latex}</mi></math>'
+
+
+def test_parallel_overlays_keep_page_order(tmp_path) -> None:
+    pages = [PDFPage(index=i, text=f"Page {i}\n\n$x_{i}$" if i % 3 else "") for i in range(1, 13)]
+    converter = LatexMathMLConverter(convert_func=_picklable_convert)
+    serial = convert_document_to_mathml_overlays(pages, converter=converter)
+    parallel = convert_document_to_mathml_overlays(pages, converter=converter, workers=2)
+    assert parallel == serial
+    assert len(parallel) == 8
+
+    destination = tmp_path / "overlays.html"
+    written = write_html_overlays(pages, str(destination), converter, workers=2)
+    assert written == 8
+    assert destination.read_text(encoding="utf-8") == "\n".join(serial) + "\n"
+
+
+def test_expression_table_interns_repeated_math(stub_converter: LatexMathMLConverter) -> None:
+    pages = [
+        PDFPage(index=1, text="$x^2$ and $x^2$\n\n$$x^2$$"),
+        PDFPage(index=2, text="Again $x^2$ then $y$"),
+    ]
+    table = MathExpressionTable()
+    compact = convert_pdf_pages_to_html_overlays(pages, stub_converter, expressions=table)
+    inline = convert_pdf_pages_to_html_overlays(pages, stub_converter)
+
+    assert len(table) == 3
+    assert "<math" not in "".join(compact)
+    assert compact[0].count('data-math-ref="m1"') == 2
+    assert [expand_math_references(html, table) for html in compact] == inline
+
+    restored = MathExpressionTable.from_html(table.to_html())
+    assert expand_math_references(compact[1], restored) == inline[1]
+
+
+def test_restored_expression_table_reuses_and_extends_ids(
+    stub_converter: LatexMathMLConverter,
+) -> None:
+    table = MathExpressionTable()
+    for latex in ("x^2", 'a < "b"', "y"):
+        table.reference(latex, stub_converter, display=False)
+    table.reference("x^2", stub_converter, display=True)
+    html = table.to_html().replace('data-math-id="m3"', 'data-math-id="m9"')
+
+    restored = MathExpressionTable.from_html(html)
+    assert restored.reference("x^2", stub_converter, display=False) == table.reference(
+        "x^2", stub_converter, display=False
+    )
+    assert 'data-math-ref="m2"' in restored.reference('a < "b"', stub_converter, display=False)
+    assert 'data-math-ref="m4"' in restored.reference("x^2", stub_converter, display=True)
+    assert 'data-math-ref="m10"' in restored.reference("z", stub_converter, display=False)
+    assert len(restored) == 5
+
+
+def test_expression_table_rejects_worker_processes(stub_converter: LatexMathMLConverter) -> None:
+    pages = [PDFPage(index=1, text="$x$")]
+    with pytest.raises(ValueError):
+        convert_pdf_pages_to_html_overlays(
+            pages, stub_converter, workers=2, expressions=MathExpressionTable()
+        )
@@ -0,0 +1,43 @@
+import pytest
+
+from mathml_conversion import MATHML_NS, LatexMathMLConverter, pdf_page_to_html_overlay
+from overlay_bundle import OverlayBundle, write_overlay_bundle
+from pipeline_lmstudio import PDFPage
+
+
+@pytest.fixture()
+def converter() -> LatexMathMLConverter:
+    def _convert(latex: str) -> str:
+        return f'<math xmlns="{MATHML_NS}"><mi>{latex}</mi></math>'
+
+    return LatexMathMLConverter(convert_func=_convert)
+
+
+def test_bundle_returns_each_page_section(tmp_path, converter: LatexMathMLConverter) -> None:
+    pages = [
+        PDFPage(index=3, text="Intro\n\n$a^2$"),
+        PDFPage(index=4, text=""),
+        PDFPage(index=5, text="Café $\\frac{1}{2}$"),
+    ]
+    path = str(tmp_path / "book.ovl")
+    assert write_overlay_bundle(pages, path, converter) == 2
+
+    with OverlayBundle(path) as bundle:
+        assert list(bundle.page_indices()) == [3, 5]
+        assert len(bundle) == 2
+        assert 4 not in bundle
+        assert bundle.page_html(5) == pdf_page_to_html_overlay(pages[2], converter)
+        view = bundle.page(3)
+        assert bytes(view).startswith(b'<section role="doc-page" data-page-index="3">')
+        view.release()
+        with pytest.raises(KeyError):
+            bundle.page(4)
+        with pytest.raises(KeyError):
+            bundle.page(99)
+
+
+def test_bundle_rejects_foreign_files(tmp_path) -> None:
+    path = tmp_path / "not-a-bundle.ovl"
+    path.write_bytes(b"<section>" * 10)
+    with pytest.raises(ValueError):
+        OverlayBundle(str(path))